@@ -2,7 +2,17 @@
 """Core functionality for Weather Dashboard"""
 
 from .api import WeatherAPI
+from .async_api import AsyncWeatherAPI
 from .storage import StorageManager
+from .history import HistorySeries, StringTable
+from .aggregates import RunningStats
+from .forecast import aggregate_daily, aggregate_daily_many
 from .processor import DataProcessor
+from .cache import ResponseCache
+from .disk_cache import DiskCache
+from .singleflight import SingleFlight
+from .rate_limit import RateLimiter, RateLimitExceeded
 
-__all__ = ['WeatherAPI', 'StorageManager', 'DataProcessor']
\ No newline at end of file
+__all__ = ['WeatherAPI', 'AsyncWeatherAPI', 'StorageManager', 'DataProcessor', 'ResponseCache', 'DiskCache', 'SingleFlight',
+           'RateLimiter', 'RateLimitExceeded', 'HistorySeries', 'StringTable',
+           'RunningStats', 'aggregate_daily', 'aggregate_daily_many']
\ No newline at end of file
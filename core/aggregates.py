@@ -0,0 +1,82 @@
+"""Running aggregates that can be updated one observation at a time"""
+
+import math
+from typing import Any, Dict, Optional
+
+# Numeric observation fields that aggregates are kept for
+AGGREGATE_METRICS = ('temperature', 'feels_like', 'humidity', 'wind_speed')
+
+# Bucket sizes in seconds for each aggregate period ('all' is one bucket)
+PERIODS = {
+    'all': None,
+    'hour': 3600,
+    'day': 86400
+}
+
+class RunningStats:
+    """Count, sum, sum of squares, min and max of a stream of values"""
+
+    __slots__ = ('count', 'total', 'total_sq', 'min', 'max')
+
+    def __init__(self, count: int = 0, total: float = 0.0, total_sq: float = 0.0,
+                 min: Optional[float] = None, max: Optional[float] = None):
+        self.count = count
+        self.total = total
+        self.total_sq = total_sq
+        self.min = min
+        self.max = max
+
+    def update(self, value: float):
+        """Add one value"""
+        self.count += 1
+        self.total += value
+        self.total_sq += value * value
+        self.min = value if self.min is None or value < self.min else self.min
+        self.max = value if self.max is None or value > self.max else self.max
+
+    def merge(self, other: 'RunningStats'):
+        """Fold another set of running stats into this one"""
+        if not other.count:
+            return
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Mean of the values seen, or None if empty"""
+        return self.total / self.count if self.count else None
+
+    @property
+    def std(self) -> Optional[float]:
+        """Population standard deviation, or None if empty"""
+        if not self.count:
+            return None
+        mean = self.total / self.count
+        return math.sqrt(max(self.total_sq / self.count - mean * mean, 0.0))
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Get count/mean/min/max/std as a dictionary"""
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'std': self.std
+        }
+
+def bucket_for(period: str, ts: float) -> int:
+    """
+    Get the bucket key for a timestamp
+
+    Args:
+        period: 'all', 'hour' or 'day'
+        ts: Epoch seconds
+
+    Returns:
+        Bucket number (UTC hours/days since the epoch, 0 for 'all')
+    """
+    size = PERIODS[period]
+    return 0 if size is None else int(ts // size)
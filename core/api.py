@@ -3,9 +3,16 @@
 
 import os
 import requests
-from typing import Dict, Any, List
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
-from datetime import datetime
+
+from .cache import ResponseCache
+from .disk_cache import DiskCache
+from .singleflight import SingleFlight
+from .rate_limit import RateLimiter, RateLimitExceeded
+from .forecast import aggregate_daily, day_key, format_day
 
 load_dotenv()  # Load environment variables
 print("API key:", os.getenv("OPENWEATHERMAP_API_KEY"))
@@ -13,58 +20,194 @@ print("API key:", os.getenv("OPENWEATHERMAP_API_KEY"))
 class WeatherAPI:
     """Handles all weather API communications"""
     
-    def __init__(self):
+    # Default cache lifetimes (seconds) per endpoint
+    CACHE_TTLS = {
+        'weather': 600,    # Current conditions: 10 minutes
+        'forecast': 3600   # 5-day/3-hour forecast: 1 hour
+    }
+    
+    def __init__(self, api_root: str = "https://api.openweathermap.org/data/2.5",
+                 pool_connections: int = 4, pool_maxsize: int = 10,
+                 max_retries: int = 3, backoff_factor: float = 0.5,
+                 pool_block: bool = False, cache: Optional[ResponseCache] = None,
+                 cache_ttls: Optional[Dict[str, float]] = None,
+                 disk_cache: Optional[DiskCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
+        """
+        Initialize the API client and its pooled HTTP session
+        
+        Args:
+            api_root: Base URL for the OpenWeatherMap endpoints
+            pool_connections: Number of per-host connection pools to keep
+            pool_maxsize: Maximum keep-alive connections per host
+            max_retries: Retries for connection errors and 429/5xx responses
+            backoff_factor: Exponential backoff factor between retries
+            pool_block: Wait for a free connection instead of opening extras
+            cache: Response cache to use (a default-sized one is created if None)
+            cache_ttls: Per-endpoint TTLs in seconds, e.g. {'weather': 600}
+            disk_cache: Optional persistent cache checked after the memory cache
+            rate_limiter: Call budget for the API key (60 calls/minute if None)
+        """
         self.api_key = os.getenv("OPENWEATHERMAP_API_KEY")
         if not self.api_key:
             raise ValueError("API key not found in environment variables")
-        self.base_url = "https://api.openweathermap.org/data/2.5/weather"
+        self.api_root = api_root.rstrip('/')
+        self.base_url = f"{self.api_root}/weather"
         self.timeout = 10
+        self.units = 'imperial'  # For Fahrenheit
+        
+        # Cache raw responses so repeat lookups skip the network
+        self.cache = cache if cache is not None else ResponseCache()
+        self.cache_ttls = dict(self.CACHE_TTLS)
+        if cache_ttls:
+            self.cache_ttls.update(cache_ttls)
+        self.disk_cache = disk_cache
+        
+        # Concurrent lookups for the same key share one network request
+        self.inflight = SingleFlight()
+        
+        # Stay under the key's quota locally; calls over budget wait up to
+        # rate_limit_timeout seconds for a slot instead of failing with 429
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.rate_limit_timeout = 30
+        
+        # One keep-alive session shared by every request so repeated
+        # lookups reuse TCP/TLS connections instead of reconnecting
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False
+        )
+        self.pool_maxsize = pool_maxsize
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+            pool_block=pool_block
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def close(self):
+        """Close the HTTP session and release pooled connections"""
+        self.session.close()
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+    
+    def __enter__(self):
+        return self
     
-    def fetch_weather(self, city: str) -> Dict[str, Any]:
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
+    def _cache_key(self, endpoint: str, city: str) -> tuple:
+        """Build the cache key for an endpoint/city lookup"""
+        return (endpoint, ' '.join(city.lower().split()), self.units)
+    
+    def _get_json(self, endpoint: str, city: str, refresh: bool = False) -> Dict[str, Any]:
         """
-        Fetch current weather for a city
+        Get a raw JSON response, served from cache when possible
         
         Args:
-            city: City name to get weather for
+            endpoint: API endpoint name ('weather' or 'forecast')
+            city: City name to query
+            refresh: Skip the cache and always hit the network
             
         Returns:
-            Weather data dictionary or None on error
+            Parsed JSON response
+            
+        Raises:
+            requests.exceptions.RequestException: On network or HTTP errors
         """
-        if not city:
-            return None
+        key = self._cache_key(endpoint, city)
+        if not refresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+            
+            # Fall back to the persistent tier, promoting hits into memory
+            if self.disk_cache is not None:
+                stored = self.disk_cache.get(key)
+                if stored is not None:
+                    data, remaining_ttl = stored
+                    self.cache.set(key, data, ttl=remaining_ttl)
+                    return data
+        
+        return self.inflight.do(key, self._request_json, endpoint, city, key)
+    
+    def _request_json(self, endpoint: str, city: str, key: tuple) -> Dict[str, Any]:
+        """Send the network request for a lookup and populate the caches"""
+        self.rate_limiter.acquire(timeout=self.rate_limit_timeout)
         
         params = {
             'q': city,
             'appid': self.api_key,
-            'units': 'imperial'  # For Fahrenheit
+            'units': self.units
         }
         
-        try:
-            print(f"Sending request to API for city: {city}")
-            print(f"API URL: {self.base_url}")
-            print(f"Params: {params}")  # Don't print the actual API key in production
-            
-            response = requests.get(
-                self.base_url,
-                params=params,
-                timeout=self.timeout
-            )
-            
-            print(f"Response status code: {response.status_code}")
-            if response.status_code != 200:
-                print(f"Error response: {response.text}")
-            
-            # Handle HTTP errors
-            response.raise_for_status()
+        print(f"Sending {endpoint} request to API for city: {city}")
+        response = self.session.get(
+            f"{self.api_root}/{endpoint}",
+            params=params,
+            timeout=self.timeout
+        )
+        
+        print(f"Response status code: {response.status_code}")
+        if response.status_code != 200:
+            print(f"Error response: {response.text}")
+        
+        # Handle HTTP errors
+        response.raise_for_status()
+        
+        data = response.json()
+        ttl = self.cache_ttls.get(endpoint, self.cache.default_ttl)
+        self.cache.set(key, data, ttl=ttl)
+        if self.disk_cache is not None:
+            self.disk_cache.set(key, data, ttl)
+        return data
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Get response cache hit/miss/eviction counters"""
+        return self.cache.stats()
+    
+    def inflight_stats(self) -> Dict[str, int]:
+        """Get counters for network requests made and calls coalesced"""
+        return self.inflight.stats()
+    
+    def quota(self) -> Dict[str, Optional[int]]:
+        """Get the remaining per-minute and per-day call budget"""
+        return self.rate_limiter.remaining()
+    
+    def fetch_weather(self, city: str, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Fetch current weather for a city
+        
+        Args:
+            city: City name to get weather for
+            refresh: Bypass the cache and force a network request
             
+        Returns:
+            Weather data dictionary or None on error
+        """
+        if not city:
+            return None
+        
+        try:
             # Return the parsed JSON data
-            return response.json()
+            return self._get_json('weather', city, refresh)
         except requests.exceptions.HTTPError as e:
-            if response.status_code == 404:
+            if e.response is not None and e.response.status_code == 404:
                 print(f"City '{city}' not found")
             else:
                 print(f"HTTP error: {e}")
             return None
+        except RateLimitExceeded as e:
+            print(str(e))
+            return None
         except requests.exceptions.ConnectionError:
             print("Network connection error. Please check your internet connection.")
             return None
@@ -78,61 +221,47 @@ class WeatherAPI:
             print(f"Unexpected error fetching weather: {e}")
             return None
     
-    def fetch_historical_weather(self, city: str, days: int = 7) -> List[Dict[str, Any]]:
+    def fetch_historical_weather(self, city: str, days: int = 7,
+                                 refresh: bool = False) -> List[Dict[str, Any]]:
         """
         Fetch historical weather data for a city
         
         Args:
             city: City name to get history for
             days: Number of days of history to get
+            refresh: Bypass the cache and force a network request
             
         Returns:
             List of daily weather data points
         """
         # Since OpenWeatherMap's historical API requires paid subscription,
-        # we'll use the 5-day/3-hour forecast API which is free
-        params = {
-            'q': city,
-            'appid': self.api_key,
-            'units': 'imperial',  # For Fahrenheit
-            'cnt': days * 8  # Get data points for requested days (8 points per day)
-        }
-        
+        # we'll use the 5-day/3-hour forecast API which is free. The full
+        # response is shared with fetch_forecast through the cache.
         try:
-            response = requests.get(
-                "https://api.openweathermap.org/data/2.5/forecast",
-                params=params,
-                timeout=self.timeout
-            )
-            
-            # Handle HTTP errors
-            response.raise_for_status()
-            
-            # Process the data to get daily readings
-            data = response.json()
+            data = self._get_json('forecast', city, refresh)
             
             if 'list' not in data:
                 print("Invalid response format")
                 return []
                 
-            # Extract daily data (take first reading of each day)
+            # Extract daily data (take first reading of each day), using the
+            # city's own calendar days rather than the host timezone
+            tz_offset = data.get('city', {}).get('timezone', 0)
             daily_data = []
-            days_added = set()
+            last_day = None
             
-            for item in data['list']:
-                # Convert timestamp to date string
-                timestamp = item['dt']
-                date = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
-                
+            # Only consider the data points for the requested days (8 per day)
+            for item in data['list'][:days * 8]:
                 # Only take first reading for each day
-                if date in days_added:
+                day = day_key(item['dt'], tz_offset)
+                if day == last_day:
                     continue
                     
-                days_added.add(date)
+                last_day = day
                 
                 # Add the data point
                 daily_data.append({
-                    'date': date,
+                    'date': format_day(day),
                     'temperature': item['main']['temp'],
                     'humidity': item['main']['humidity'],
                     'description': item['weather'][0]['description'],
@@ -149,42 +278,29 @@ class WeatherAPI:
             print(f"Error fetching historical data: {e}")
             return []
     
-    def fetch_forecast(self, city: str) -> Dict[str, Any]:
+    def fetch_forecast(self, city: str, refresh: bool = False) -> Dict[str, Any]:
         """
         Fetch 7-day weather forecast for a city
         
         Args:
             city: City name to get forecast for
+            refresh: Bypass the cache and force a network request
             
         Returns:
             Dictionary with forecast data
         """
         try:
             # Use the 5-day/3-hour forecast API (free tier)
-            params = {
-                'q': city,
-                'appid': self.api_key,
-                'units': 'imperial'  # For Fahrenheit
-            }
-            
-            response = requests.get(
-                "https://api.openweathermap.org/data/2.5/forecast",
-                params=params,
-                timeout=self.timeout
-            )
-            
-            # Handle HTTP errors
-            response.raise_for_status()
-            
-            # Process the data
-            data = response.json()
+            data = self._get_json('forecast', city, refresh)
             
             if 'list' not in data:
                 print("Invalid response format")
                 return {}
             
             # Convert the 3-hour forecasts into daily forecasts
-            daily_forecasts = self._process_forecast_data(data['list'])
+            city_info = data.get('city', {})
+            daily_forecasts = self._process_forecast_data(
+                data['list'], city_info.get('timezone', 0))
             
             return {
                 'city': data.get('city', {}),
@@ -198,45 +314,16 @@ class WeatherAPI:
             print(f"Error fetching forecast for {city}: {e}")
             return {}
 
-    def _process_forecast_data(self, forecast_list: List[Dict]) -> List[Dict]:
+    def _process_forecast_data(self, forecast_list: List[Dict], tz_offset: int = 0) -> List[Dict]:
         """
         Process 3-hour forecast data into daily forecasts
         
         Args:
             forecast_list: List of 3-hour forecast data points
+            tz_offset: City's offset from UTC in seconds
             
         Returns:
-            List of daily forecast dictionaries
+            List of up to 7 daily forecast dictionaries with min/max/mean
+            temperature and the day's dominant weather condition
         """
-        daily_data = {}
-        
-        for item in forecast_list:
-            # Get the date for this forecast item
-            timestamp = item['dt']
-            date = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
-            
-            if date not in daily_data:
-                daily_data[date] = {
-                    'dt': timestamp,
-                    'temp': {'max': float('-inf'), 'min': float('inf')},
-                    'weather': item['weather'],
-                    'temps': []  # Store all temps to calculate average
-                }
-            
-            # Update min/max temperatures
-            temp = item['main']['temp']
-            daily_data[date]['temps'].append(temp)
-            daily_data[date]['temp']['max'] = max(daily_data[date]['temp']['max'], temp)
-            daily_data[date]['temp']['min'] = min(daily_data[date]['temp']['min'], temp)
-        
-        # Convert to list and limit to 7 days
-        result = []
-        for date in sorted(daily_data.keys())[:7]:
-            day_data = daily_data[date]
-            result.append({
-                'dt': day_data['dt'],
-                'temp': day_data['temp'],
-                'weather': day_data['weather']
-            })
-        
-        return result
+        return aggregate_daily(forecast_list, tz_offset, max_days=7)
@@ -0,0 +1,140 @@
+"""Asyncio front end for the weather API client"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from .api import WeatherAPI
+
+class AsyncWeatherAPI:
+    """Runs WeatherAPI lookups concurrently from asyncio code
+
+    Requests are executed on a worker pool sharing the wrapped client's
+    keep-alive session and caches, so concurrent lookups reuse pooled
+    connections and cached responses.
+    """
+
+    def __init__(self, api: Optional[WeatherAPI] = None, concurrency: int = 50):
+        """
+        Initialize the async client
+
+        Args:
+            api: Synchronous client to wrap. If None, a new one is created
+                with a connection pool of `concurrency` connections
+            concurrency: Maximum number of requests in flight at once. The
+                default fetches a 50-city batch in about one round trip.
+                A wrapped client only keeps its pool_maxsize connections
+                alive; requests beyond that open connections that are
+                closed again after use
+        """
+        self.concurrency = max(1, concurrency)
+        if api is None:
+            api = WeatherAPI(pool_maxsize=self.concurrency)
+        elif self.concurrency > api.pool_maxsize:
+            print(f"AsyncWeatherAPI: concurrency {self.concurrency} exceeds the client's "
+                  f"pool of {api.pool_maxsize} connections; extra connections won't be reused")
+        self.api = api
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency,
+            thread_name_prefix="AsyncWeatherAPI"
+        )
+
+    async def _run(self, func, *args):
+        """Run a blocking client call on the worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def fetch_weather(self, city: str, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Fetch current weather for a city
+
+        Args:
+            city: City name to get weather for
+            refresh: Bypass the cache and force a network request
+
+        Returns:
+            Weather data dictionary or None on error
+        """
+        return await self._run(self.api.fetch_weather, city, refresh)
+
+    async def fetch_forecast(self, city: str, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Fetch the daily forecast for a city
+
+        Args:
+            city: City name to get forecast for
+            refresh: Bypass the cache and force a network request
+
+        Returns:
+            Dictionary with forecast data
+        """
+        return await self._run(self.api.fetch_forecast, city, refresh)
+
+    async def fetch_historical_weather(self, city: str, days: int = 7,
+                                       refresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        Fetch daily weather data points for a city
+
+        Args:
+            city: City name to get history for
+            days: Number of days to get
+            refresh: Bypass the cache and force a network request
+
+        Returns:
+            List of daily weather data points
+        """
+        return await self._run(self.api.fetch_historical_weather, city, days, refresh)
+
+    async def fetch_many(self, cities: Iterable[str], kind: str = 'weather',
+                         concurrency: Optional[int] = None,
+                         refresh: bool = False) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Fetch several cities concurrently, yielding results as they complete
+
+        Args:
+            cities: City names to fetch
+            kind: 'weather', 'forecast' or 'historical'
+            concurrency: Per-call limit on requests in flight (defaults to
+                the client's concurrency)
+            refresh: Bypass the cache and force network requests
+
+        Yields:
+            (city, result) tuples in completion order
+        """
+        fetchers = {
+            'weather': self.fetch_weather,
+            'forecast': self.fetch_forecast,
+            'historical': lambda city, refresh: self.fetch_historical_weather(
+                city, refresh=refresh)
+        }
+        if kind not in fetchers:
+            raise ValueError(f"Unknown fetch kind: {kind}")
+        fetch = fetchers[kind]
+
+        limit = asyncio.Semaphore(min(concurrency or self.concurrency, self.concurrency))
+
+        async def fetch_one(city):
+            async with limit:
+                return city, await fetch(city, refresh)
+
+        tasks = [asyncio.ensure_future(fetch_one(city)) for city in cities]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Don't leave requests running if the caller stops early
+            for task in tasks:
+                task.cancel()
+
+    async def close(self):
+        """Shut down the worker pool and close the wrapped client"""
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._executor.shutdown, True)
+        self.api.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+        return False
@@ -0,0 +1,149 @@
+"""Persistent on-disk cache for weather API responses"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+class DiskCache:
+    """SQLite-backed response cache that survives application restarts"""
+
+    def __init__(self, filename: str, compact_interval: float = 300):
+        """
+        Open (or create) the cache database
+
+        Args:
+            filename: Path of the SQLite database file
+            compact_interval: Seconds between background purges of expired
+                entries (0 disables the background thread)
+        """
+        self.filename = filename
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(filename, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                   key TEXT PRIMARY KEY,
+                   payload TEXT NOT NULL,
+                   fetched_at REAL NOT NULL,
+                   ttl REAL NOT NULL,
+                   expires_at REAL NOT NULL
+               )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_expires ON responses (expires_at)"
+        )
+        self._conn.commit()
+
+        self._stop = threading.Event()
+        self._compactor = None
+        if compact_interval > 0:
+            self._compactor = threading.Thread(
+                target=self._compact_loop,
+                args=(compact_interval,),
+                name="DiskCacheCompactor",
+                daemon=True
+            )
+            self._compactor.start()
+
+    @staticmethod
+    def _encode_key(key: Hashable) -> str:
+        """Serialize a cache key to a stable string"""
+        if isinstance(key, tuple):
+            key = list(key)
+        return json.dumps(key)
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """
+        Look up a stored response
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (response data, seconds left to live), or None if
+            missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, expires_at FROM responses WHERE key = ?",
+                (self._encode_key(key),)
+            ).fetchone()
+
+        if row is None or row[1] <= now:
+            return None
+
+        try:
+            return json.loads(row[0]), row[1] - now
+        except ValueError as e:
+            print(f"Discarding corrupt cache entry: {e}")
+            return None
+
+    def set(self, key: Hashable, data: Any, ttl: float):
+        """
+        Store a raw response
+
+        Args:
+            key: Cache key
+            data: JSON-serializable response data
+            ttl: Lifetime in seconds
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                    (self._encode_key(key), json.dumps(data), now, ttl, now + ttl)
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing response cache: {e}")
+
+    def compact(self) -> int:
+        """
+        Delete expired entries
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE expires_at <= ?", (time.time(),)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def _compact_loop(self, interval: float):
+        """Periodically purge expired entries until closed"""
+        while not self._stop.wait(interval):
+            try:
+                removed = self.compact()
+                if removed:
+                    print(f"Removed {removed} expired cache entries")
+            except sqlite3.Error as e:
+                print(f"Error compacting response cache: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number of stored and expired entries"""
+        with self._lock:
+            total, expired = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(expires_at <= ?), 0) FROM responses",
+                (time.time(),)
+            ).fetchone()
+        return {'size': total, 'expired': expired}
+
+    def close(self):
+        """Stop background compaction and close the database"""
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,119 @@
+"""Single-pass aggregation of 3-hour forecast data into days"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping
+
+SECONDS_PER_DAY = 86400
+
+def day_key(timestamp: int, tz_offset: int = 0) -> int:
+    """
+    Get the local day number for a UTC timestamp
+
+    Args:
+        timestamp: Epoch seconds (UTC)
+        tz_offset: City's offset from UTC in seconds
+
+    Returns:
+        Days since the epoch in the city's local time
+    """
+    return (timestamp + tz_offset) // SECONDS_PER_DAY
+
+def format_day(key: int) -> str:
+    """Format a day number from day_key() as 'YYYY-MM-DD'"""
+    return datetime.fromtimestamp(key * SECONDS_PER_DAY, timezone.utc).strftime('%Y-%m-%d')
+
+def aggregate_daily(forecast_list: List[Dict[str, Any]], tz_offset: int = 0,
+                    max_days: int = 7) -> List[Dict[str, Any]]:
+    """
+    Fold 3-hour forecast items into daily summaries in one pass
+
+    Items are bucketed by local calendar day using the city's UTC offset,
+    so day boundaries don't depend on the host timezone. Items are expected
+    in time order, as the API returns them.
+
+    Args:
+        forecast_list: 'list' from the forecast API response
+        tz_offset: City's offset from UTC in seconds ('city.timezone')
+        max_days: Maximum number of days to return
+
+    Returns:
+        List of daily dictionaries with 'dt' (first timestamp of the day),
+        'date', 'temp' ({'min', 'max', 'mean'}) and 'weather' (the day's
+        most frequent condition, in the API's weather list format)
+    """
+    days = []
+    current = None
+    current_key = None
+
+    for item in forecast_list:
+        timestamp = item['dt']
+        key = (timestamp + tz_offset) // SECONDS_PER_DAY
+
+        if key != current_key:
+            if len(days) == max_days:
+                break
+            current_key = key
+            current = {
+                'dt': timestamp,
+                'key': key,
+                'min': float('inf'),
+                'max': float('-inf'),
+                'sum': 0.0,
+                'count': 0,
+                'conditions': {}  # main condition -> [count, weather list]
+            }
+            days.append(current)
+
+        temp = item['main']['temp']
+        if temp < current['min']:
+            current['min'] = temp
+        if temp > current['max']:
+            current['max'] = temp
+        current['sum'] += temp
+        current['count'] += 1
+
+        weather = item['weather']
+        condition = weather[0]['main'] if weather else None
+        seen = current['conditions'].get(condition)
+        if seen is None:
+            current['conditions'][condition] = [1, weather]
+        else:
+            seen[0] += 1
+
+    result = []
+    for day in days:
+        # max() keeps the first condition seen among equally frequent ones
+        dominant = max(day['conditions'].values(), key=lambda entry: entry[0])
+        result.append({
+            'dt': day['dt'],
+            'date': format_day(day['key']),
+            'temp': {
+                'max': day['max'],
+                'min': day['min'],
+                'mean': day['sum'] / day['count']
+            },
+            'weather': dominant[1]
+        })
+    return result
+
+def aggregate_daily_many(responses: Mapping[str, Dict[str, Any]],
+                         max_days: int = 7) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Aggregate raw forecast responses for several cities
+
+    Args:
+        responses: {city: raw forecast API response}
+        max_days: Maximum number of days per city
+
+    Returns:
+        {city: daily summaries as returned by aggregate_daily}; cities whose
+        response has no forecast list get an empty list
+    """
+    results = {}
+    for city, response in responses.items():
+        if not response or 'list' not in response:
+            results[city] = []
+            continue
+        tz_offset = response.get('city', {}).get('timezone', 0)
+        results[city] = aggregate_daily(response['list'], tz_offset, max_days)
+    return results
@@ -0,0 +1,166 @@
+"""Compact array-backed representation of weather history"""
+
+import math
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+def _number(value: Any) -> float:
+    """Coerce a stored value to float, using NaN for missing or invalid data"""
+    if value is None or isinstance(value, bool):
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+def _timestamp(value: Any) -> float:
+    """Convert an ISO timestamp to epoch seconds, using NaN for missing or invalid data"""
+    if not value:
+        return math.nan
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return math.nan
+
+class StringTable:
+    """Interns repeated strings (descriptions, countries) as integer codes"""
+
+    __slots__ = ('_codes', 'strings')
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self.strings: List[Optional[str]] = [None]  # Code 0 means missing
+
+    def code(self, value: Optional[str]) -> int:
+        """Get the code for a string, adding it if new"""
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self._codes[value] = code
+            self.strings.append(value)
+        return code
+
+    def lookup(self, code: int) -> Optional[str]:
+        """Get the string for a code"""
+        return self.strings[code]
+
+    def __len__(self):
+        return len(self.strings) - 1
+
+class HistorySeries:
+    """Weather observations for one city stored as typed columns
+
+    Timestamps are epoch seconds and numeric fields are doubles (NaN when
+    missing), each held in an ``array``. Description and country are
+    stored as codes into a StringTable that can be shared between cities.
+    """
+
+    __slots__ = ('city', 'strings', 'ts', 'temperature', 'feels_like',
+                 'humidity', 'wind_speed', 'description', 'country')
+
+    NUMERIC = ('temperature', 'feels_like', 'humidity', 'wind_speed')
+    CODED = ('description', 'country')
+
+    def __init__(self, city: str, strings: Optional[StringTable] = None):
+        """
+        Create an empty series
+
+        Args:
+            city: City the observations belong to
+            strings: String table to intern text fields into
+        """
+        self.city = city
+        self.strings = strings if strings is not None else StringTable()
+        self.ts = array('d')
+        self.temperature = array('d')
+        self.feels_like = array('d')
+        self.humidity = array('d')
+        self.wind_speed = array('d')
+        self.description = array('I')
+        self.country = array('I')
+
+    def __len__(self):
+        return len(self.ts)
+
+    def append_row(self, ts: float, temperature: Optional[float],
+                   feels_like: Optional[float], humidity: Optional[float],
+                   wind_speed: Optional[float], description: Optional[str],
+                   country: Optional[str]):
+        """Append one observation given as individual values"""
+        self.ts.append(ts)
+        self.temperature.append(_number(temperature))
+        self.feels_like.append(_number(feels_like))
+        self.humidity.append(_number(humidity))
+        self.wind_speed.append(_number(wind_speed))
+        self.description.append(self.strings.code(description))
+        self.country.append(self.strings.code(country))
+
+    def append(self, record: Dict[str, Any]):
+        """
+        Append one observation in the dict shape used by StorageManager
+
+        Args:
+            record: Processed weather data with an ISO 'timestamp' (stored
+                as NaN if missing or invalid, like the numeric fields)
+        """
+        self.append_row(
+            _timestamp(record.get('timestamp')),
+            record.get('temperature'),
+            record.get('feels_like'),
+            record.get('humidity'),
+            record.get('wind_speed'),
+            record.get('description'),
+            record.get('country')
+        )
+
+    @classmethod
+    def from_records(cls, city: str, records: Iterable[Dict[str, Any]],
+                     strings: Optional[StringTable] = None) -> 'HistorySeries':
+        """
+        Build a series from a list of stored weather dicts
+
+        Args:
+            city: City the records belong to
+            records: Records as returned by StorageManager.load_history
+            strings: String table to intern text fields into
+
+        Returns:
+            New HistorySeries
+        """
+        series = cls(city, strings)
+        for record in records:
+            series.append(record)
+        return series
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        Convert back to the list-of-dicts shape used by StorageManager
+
+        Returns:
+            List of weather data dictionaries in time order
+        """
+        lookup = self.strings.lookup
+        records = []
+        for i in range(len(self.ts)):
+            record = {}
+            for field in self.NUMERIC:
+                value = getattr(self, field)[i]
+                record[field] = None if math.isnan(value) else value
+            record['description'] = lookup(self.description[i])
+            record['city'] = self.city
+            record['country'] = lookup(self.country[i])
+            ts = self.ts[i]
+            record['timestamp'] = None if math.isnan(ts) else datetime.fromtimestamp(ts).isoformat()
+            records.append(record)
+        return records
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the column buffers"""
+        return sum(getattr(self, name).itemsize * len(getattr(self, name))
+                   for name in ('ts',) + self.NUMERIC + self.CODED)
+
+# Weather history as accepted by the statistics functions
+History = Union[HistorySeries, List[Dict[str, Any]]]
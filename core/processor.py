@@ -1,8 +1,13 @@
 # core/processor.py
 """Data processing for weather information"""
 
-from typing import Dict, List, Any
-from statistics import mean
+import math
+from typing import Dict, List, Any, Mapping, Sequence
+
+from .history import History
+from .aggregates import AGGREGATE_METRICS, RunningStats
+
+# NumPy and core.stats are imported on first use to keep startup fast
 
 class DataProcessor:
     """Handles processing and analysis of weather data"""
@@ -31,31 +36,184 @@ class DataProcessor:
             print(f"Error processing API response: Missing key {e}")
             return {}
     
-    def calculate_statistics(self, history: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def process_many(self, responses: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Extract weather information from many API responses at once
+
+        Unlike process_api_response, failures are reported per record
+        instead of printed.
+
+        Args:
+            responses: Raw API responses
+
+        Returns:
+            Columnar batch: NumPy arrays for 'temperature', 'feels_like',
+            'humidity' and 'wind_speed' (NaN for failed records), lists for
+            'description', 'city' and 'country' (None for failed records),
+            a boolean 'valid' array and an 'errors' list holding None or the
+            failure message for each record
+        """
+        import numpy as np
+
+        nan_row = (math.nan,) * 4
+        rows = []
+        descriptions = []
+        cities = []
+        countries = []
+        errors = []
+
+        for response in responses:
+            try:
+                main = response['main']
+                row = (main['temp'], main['feels_like'], main['humidity'],
+                       response['wind']['speed'])
+                text = (response['weather'][0]['description'], response['name'],
+                        response['sys']['country'])
+                error = None
+            except KeyError as e:
+                error = f"Missing key {e}"
+            except (TypeError, IndexError) as e:
+                error = f"Invalid response: {e}"
+
+            if error is None:
+                rows.append(row)
+                descriptions.append(text[0])
+                cities.append(text[1])
+                countries.append(text[2])
+            else:
+                rows.append(nan_row)
+                descriptions.append(None)
+                cities.append(None)
+                countries.append(None)
+            errors.append(error)
+
+        try:
+            numeric = np.array(rows, dtype=np.float64).reshape(len(rows), 4).T
+        except (TypeError, ValueError):
+            # Some record holds a non-numeric value; find and flag it
+            for i, row in enumerate(rows):
+                try:
+                    rows[i] = tuple(float(value) for value in row)
+                except (TypeError, ValueError) as e:
+                    rows[i] = nan_row
+                    descriptions[i] = cities[i] = countries[i] = None
+                    errors[i] = f"Invalid response: {e}"
+            numeric = np.array(rows, dtype=np.float64).reshape(len(rows), 4).T
+        valid = np.array([error is None for error in errors], dtype=bool)
+        return {
+            'temperature': np.round(numeric[0], 1),
+            'feels_like': np.round(numeric[1], 1),
+            'humidity': numeric[2],
+            'wind_speed': numeric[3],
+            'description': descriptions,
+            'city': cities,
+            'country': countries,
+            'valid': valid,
+            'errors': errors
+        }
+
+    def calculate_statistics(self, history: History) -> Dict[str, Any]:
         """
         Calculate statistics from historical weather data
         
         Args:
-            history: List of historical weather data
+            history: List of historical weather data, or a HistorySeries
             
         Returns:
-            Dictionary with statistical information
+            Dictionary with statistical information; 'metrics' holds the full
+            per-metric summary (mean/min/max/std/percentiles)
         """
         if not history or len(history) < 2:
             return {'error': 'Not enough data for statistics'}
         
         try:
-            temperatures = [entry['temperature'] for entry in history]
-            humidities = [entry['humidity'] for entry in history]
+            from . import stats
+            summary = stats.summarize(history)
+            return self._format_statistics(summary, len(history))
+        except Exception as e:
+            return {'error': f'Error calculating statistics: {e}'}
             
-            return {
-                'avg_temp': round(mean(temperatures), 1),
-                'min_temp': round(min(temperatures), 1),
-                'max_temp': round(max(temperatures), 1),
-                'avg_humidity': round(mean(humidities), 1),
-                'data_points': len(history)
-            }
-        except KeyError as e:
-            return {'error': f'Missing data in history: {e}'}
+    def calculate_statistics_many(self, histories: Mapping[str, History]) -> Dict[str, Dict[str, Any]]:
+        """
+        Calculate statistics for several cities at once
+
+        Args:
+            histories: {city: list of weather data or HistorySeries}
+
+        Returns:
+            {city: statistics as returned by calculate_statistics}
+        """
+        results = {city: {'error': 'Not enough data for statistics'}
+                   for city, history in histories.items() if len(history) < 2}
+        eligible = {city: history for city, history in histories.items()
+                    if city not in results}
+
+        try:
+            from . import stats
+            for city, summary in stats.summarize_many(eligible).items():
+                results[city] = self._format_statistics(summary, len(eligible[city]))
         except Exception as e:
-            return {'error': f'Error calculating statistics: {e}'}
\ No newline at end of file
+            for city in eligible:
+                results[city] = {'error': f'Error calculating statistics: {e}'}
+        return results
+
+    def daily_statistics(self, history: History, tz_offset: float = 0) -> Dict[str, Any]:
+        """
+        Calculate per-day mean/min/max for each metric
+
+        Args:
+            history: List of historical weather data, or a HistorySeries
+            tz_offset: Seconds east of UTC used to place day boundaries
+
+        Returns:
+            Dictionary of daily aggregate arrays (see core.stats.daily_aggregates)
+        """
+        from . import stats
+        return stats.daily_aggregates(history, tz_offset=tz_offset)
+
+    def statistics_from_aggregates(self, aggregates: Mapping[str, RunningStats]) -> Dict[str, Any]:
+        """
+        Build statistics from precomputed running aggregates
+
+        Gives the same keys as calculate_statistics (without percentiles)
+        without touching the history itself.
+
+        Args:
+            aggregates: {metric: RunningStats}, e.g. from
+                StorageManager.get_aggregates(city)
+
+        Returns:
+            Dictionary with statistical information
+        """
+        data_points = max((agg.count for agg in aggregates.values()), default=0)
+        if data_points < 2:
+            return {'error': 'Not enough data for statistics'}
+
+        summary = {}
+        for metric in AGGREGATE_METRICS:
+            values = aggregates.get(metric, RunningStats()).as_dict()
+            summary[metric] = {key: math.nan if value is None else float(value)
+                               for key, value in values.items()}
+            summary[metric]['count'] = values['count']
+        return self._format_statistics(summary, data_points)
+
+    @staticmethod
+    def _format_statistics(summary: Dict[str, Dict[str, float]], data_points: int) -> Dict[str, Any]:
+        """Build the statistics dictionary from a metric summary"""
+        temperature = summary['temperature']
+        humidity = summary['humidity']
+        if temperature['count'] == 0 or humidity['count'] == 0:
+            missing = 'temperature' if temperature['count'] == 0 else 'humidity'
+            return {'error': f"Missing data in history: '{missing}'"}
+
+        return {
+            'avg_temp': round(temperature['mean'], 1),
+            'min_temp': round(temperature['min'], 1),
+            'max_temp': round(temperature['max'], 1),
+            'avg_humidity': round(humidity['mean'], 1),
+            'data_points': data_points,
+            'metrics': {metric: {key: value if key == 'count' else
+                                 None if math.isnan(value) else round(value, 2)
+                                 for key, value in values.items()}
+                        for metric, values in summary.items()}
+        }
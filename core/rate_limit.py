@@ -0,0 +1,112 @@
+"""Client-side rate limiting for weather API calls"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+class RateLimitExceeded(Exception):
+    """Raised when a call cannot be scheduled within the allowed wait"""
+
+class TokenBucket:
+    """Token bucket that refills continuously up to its capacity"""
+
+    def __init__(self, capacity: int, period: float):
+        """
+        Initialize a full bucket
+
+        Args:
+            capacity: Maximum number of calls allowed per period
+            period: Length of the period in seconds
+        """
+        self.capacity = float(capacity)
+        self.rate = capacity / period  # Tokens added per second
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        """Add the tokens earned since the last update"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until one token is available (0 if available now)"""
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class RateLimiter:
+    """Per-minute and per-day call budget for an API key"""
+
+    def __init__(self, per_minute: Optional[int] = 60, per_day: Optional[int] = None):
+        """
+        Initialize the limiter
+
+        Args:
+            per_minute: Calls allowed per minute (None for no limit)
+            per_day: Calls allowed per day (None for no limit)
+        """
+        self._lock = threading.Lock()
+        self.buckets: Dict[str, TokenBucket] = {}
+        if per_minute:
+            self.buckets['minute'] = TokenBucket(per_minute, 60)
+        if per_day:
+            self.buckets['day'] = TokenBucket(per_day, 86400)
+        self.calls = 0
+        self.deferred = 0
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Take one call from every budget, waiting until one is available
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Raises:
+            RateLimitExceeded: If the call can't be made within timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = False
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                for bucket in self.buckets.values():
+                    bucket.refill(now)
+                wait = max((b.wait_time() for b in self.buckets.values()), default=0.0)
+
+                if wait == 0:
+                    for bucket in self.buckets.values():
+                        bucket.tokens -= 1
+                    self.calls += 1
+                    if waited:
+                        self.deferred += 1
+                    return
+
+                if deadline is not None and now + wait > deadline:
+                    raise RateLimitExceeded(
+                        f"API rate limit reached; next call allowed in {wait:.0f} seconds")
+
+            waited = True
+            time.sleep(wait)
+
+    def remaining(self) -> Dict[str, Optional[int]]:
+        """
+        Get the remaining call budget
+
+        Returns:
+            Dictionary with calls left this minute and today (None when that
+            budget is unlimited), plus total and deferred call counts
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = {}
+            for name in ('minute', 'day'):
+                bucket = self.buckets.get(name)
+                if bucket is None:
+                    state[name] = None
+                else:
+                    bucket.refill(now)
+                    state[name] = int(bucket.tokens)
+            state['calls'] = self.calls
+            state['deferred'] = self.deferred
+            return state
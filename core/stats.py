@@ -0,0 +1,221 @@
+"""Vectorized statistics over weather history"""
+
+from typing import Any, Dict, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from .history import History, HistorySeries, _timestamp
+
+METRICS = ('temperature', 'feels_like', 'humidity', 'wind_speed')
+PERCENTILES = (5, 25, 50, 75, 95)
+
+def to_values(history: History, metrics: Sequence[str] = METRICS) -> np.ndarray:
+    """
+    Get a metrics matrix from history
+
+    HistorySeries columns are wrapped without copying. Dict records are
+    converted once, with missing values as NaN; timestamps aren't read.
+
+    Args:
+        history: HistorySeries or list of stored weather dicts
+        metrics: Metric names to extract
+
+    Returns:
+        Matrix with one row per metric and one column per observation
+    """
+    if isinstance(history, HistorySeries):
+        if not len(history):
+            return np.empty((len(metrics), 0))
+        return np.vstack([np.frombuffer(getattr(history, m), dtype=np.float64)
+                          for m in metrics])
+
+    return np.array([[np.nan if r.get(m) is None else r[m] for r in history]
+                     for m in metrics], dtype=np.float64).reshape(len(metrics), len(history))
+
+def to_columns(history: History, metrics: Sequence[str] = METRICS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get timestamps and a metrics matrix from history
+
+    Only for aggregates that need observation times; dict records' ISO
+    timestamps are parsed here, with missing or invalid ones as NaN.
+
+    Args:
+        history: HistorySeries or list of stored weather dicts
+        metrics: Metric names to extract
+
+    Returns:
+        Tuple of (timestamps, values) where values has one row per metric
+    """
+    if isinstance(history, HistorySeries):
+        ts = np.frombuffer(history.ts, dtype=np.float64)
+    else:
+        ts = np.array([_timestamp(r.get('timestamp')) for r in history], dtype=np.float64)
+    return ts, to_values(history, metrics)
+
+def summarize(history: History, metrics: Sequence[str] = METRICS,
+              percentiles: Sequence[float] = PERCENTILES) -> Dict[str, Dict[str, float]]:
+    """
+    Compute summary statistics for every metric in one pass
+
+    Args:
+        history: HistorySeries or list of stored weather dicts
+        metrics: Metric names to summarize
+        percentiles: Percentiles to report as 'p<N>' keys
+
+    Returns:
+        {metric: {'count', 'mean', 'min', 'max', 'std', 'p<N>'...}}; metrics
+        without data have count 0 and NaN statistics
+    """
+    values = to_values(history, metrics)
+    return _summarize_matrix(values, metrics, percentiles)
+
+def _percentiles(values: np.ndarray, percentiles: Sequence[float]) -> Dict[str, np.ndarray]:
+    """Row-wise percentiles of a matrix, NaN for rows without data"""
+    result = {f'p{p:g}': np.full(values.shape[0], np.nan) for p in percentiles}
+    has_data = (~np.isnan(values)).any(axis=1)
+    if len(percentiles) and has_data.any():
+        rows = np.nanpercentile(values[has_data], percentiles, axis=1)
+        for p, row in zip(percentiles, rows):
+            result[f'p{p:g}'][has_data] = row
+    return result
+
+def _summarize_matrix(values: np.ndarray, metrics: Sequence[str],
+                      percentiles: Sequence[float]) -> Dict[str, Dict[str, float]]:
+    """Summarize a (metrics x observations) matrix row-wise"""
+    counts = np.count_nonzero(~np.isnan(values), axis=1)
+    has_data = counts > 0
+
+    stats = {key: np.full(len(metrics), np.nan) for key in ('mean', 'min', 'max', 'std')}
+    if has_data.any():
+        present = values[has_data]
+        stats['mean'][has_data] = np.nanmean(present, axis=1)
+        stats['min'][has_data] = np.nanmin(present, axis=1)
+        stats['max'][has_data] = np.nanmax(present, axis=1)
+        stats['std'][has_data] = np.nanstd(present, axis=1)
+    stats.update(_percentiles(values, percentiles))
+
+    return {metric: {'count': int(counts[i]),
+                     **{key: float(column[i]) for key, column in stats.items()}}
+            for i, metric in enumerate(metrics)}
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing mean over the last `window` observations, ignoring NaN
+
+    Args:
+        values: 1-D array or (metrics x observations) matrix
+        window: Number of observations per window (at least 1; windows
+            longer than the data cover all of it)
+
+    Returns:
+        Array of the same shape (NaN where a window has no data)
+
+    Raises:
+        ValueError: If window is less than 1
+    """
+    if window < 1:
+        raise ValueError(f"window must be at least 1, got {window}")
+    values = np.atleast_2d(values)
+    window = min(int(window), max(values.shape[1], 1))
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=1)
+    counts = np.cumsum(valid, axis=1)
+    sums[:, window:] = sums[:, window:] - sums[:, :-window]
+    counts[:, window:] = counts[:, window:] - counts[:, :-window]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = sums / counts
+    return result if result.shape[0] > 1 else result[0]
+
+def daily_aggregates(history: History, metrics: Sequence[str] = METRICS,
+                     tz_offset: float = 0) -> Dict[str, Any]:
+    """
+    Per-day mean/min/max for every metric
+
+    Args:
+        history: HistorySeries or list of stored weather dicts, in time order
+        metrics: Metric names to aggregate
+        tz_offset: Seconds east of UTC used to place day boundaries
+
+    Returns:
+        {'day': epoch seconds at the start of each day,
+         metric: {'mean': array, 'min': array, 'max': array, 'count': array}}
+    """
+    ts, values = to_columns(history, metrics)
+    keep = ~np.isnan(ts)
+    ts, values = ts[keep], values[:, keep]
+    if ts.size == 0:
+        empty = np.empty(0)
+        return {'day': empty, **{m: {'mean': empty, 'min': empty, 'max': empty,
+                                     'count': empty.astype(np.int64)} for m in metrics}}
+
+    days = np.floor_divide(ts + tz_offset, 86400).astype(np.int64)
+    order = np.argsort(days, kind='stable')
+    days, values = days[order], values[:, order]
+    unique_days, starts = np.unique(days, return_index=True)
+
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=1)
+    counts = np.add.reduceat(valid.astype(np.int64), starts, axis=1)
+    mins = np.fmin.reduceat(values, starts, axis=1)
+    maxs = np.fmax.reduceat(values, starts, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+
+    result = {'day': unique_days * 86400.0 - tz_offset}
+    for i, metric in enumerate(metrics):
+        result[metric] = {'mean': means[i], 'min': mins[i], 'max': maxs[i], 'count': counts[i]}
+    return result
+
+def summarize_many(histories: Mapping[str, History], metrics: Sequence[str] = METRICS,
+                   percentiles: Sequence[float] = PERCENTILES) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Summarize many cities' histories
+
+    Count/mean/min/max/std for all cities come from segment reductions over
+    one concatenated matrix; percentiles are taken per city.
+
+    Args:
+        histories: {city: HistorySeries or list of dicts}
+        metrics: Metric names to summarize
+        percentiles: Percentiles to report as 'p<N>' keys
+
+    Returns:
+        {city: summary as returned by summarize()}
+    """
+    cities = list(histories)
+    if not cities:
+        return {}
+
+    matrices = [to_values(histories[city], metrics) for city in cities]
+    sizes = np.array([m.shape[1] for m in matrices])
+    values = np.hstack(matrices)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    # Segment reductions over the concatenated matrix; empty cities are
+    # left out because reduceat can't express zero-length segments
+    nonempty = np.flatnonzero(sizes)
+    counts = np.zeros((len(metrics), len(cities)), dtype=np.int64)
+    stats = {key: np.full((len(metrics), len(cities)), np.nan)
+             for key in ('mean', 'min', 'max', 'std')}
+    if nonempty.size:
+        idx = starts[nonempty]
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+        counts[:, nonempty] = np.add.reduceat(valid.astype(np.int64), idx, axis=1)
+        sums = np.add.reduceat(filled, idx, axis=1)
+        squares = np.add.reduceat(filled * filled, idx, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts[:, nonempty]
+            stats['mean'][:, nonempty] = means
+            stats['std'][:, nonempty] = np.sqrt(np.maximum(squares / counts[:, nonempty] - means * means, 0.0))
+        stats['min'][:, nonempty] = np.fmin.reduceat(values, idx, axis=1)
+        stats['max'][:, nonempty] = np.fmax.reduceat(values, idx, axis=1)
+
+    results = {}
+    for j, city in enumerate(cities):
+        city_stats = {key: column[:, j] for key, column in stats.items()}
+        city_stats.update(_percentiles(values[:, starts[j]:starts[j] + sizes[j]], percentiles))
+        results[city] = {metric: {'count': int(counts[i, j]),
+                                  **{key: float(column[i]) for key, column in city_stats.items()}}
+                         for i, metric in enumerate(metrics)}
+    return results
@@ -3,21 +3,238 @@
 
 import json
 import os
+import sqlite3
+import threading
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Tuple, Union
+
+from .history import HistorySeries, StringTable
+from .aggregates import AGGREGATE_METRICS, PERIODS, RunningStats, bucket_for
 
 class StorageManager:
-    """Handles saving and loading weather data"""
+    """Handles saving and loading weather data
     
-    def __init__(self, filename: str):
-        self.filename = filename
+    Observations are appended to a SQLite database indexed on
+    (city, timestamp), so each save costs the same regardless of how much
+    history has accumulated. Passing a legacy ``.json`` filename stores
+    data in a sibling ``.db`` file and imports the JSON history once.
+
+    With ``write_behind`` enabled, saves are buffered and committed in
+    batches by a background thread; reads and close() flush first.
+
+    Per-city running aggregates (overall, hourly and daily buckets) are
+    updated in the same transaction as every insert, so statistics can be
+    read without rescanning history.
+    """
+
+    # Processed weather fields stored as their own columns
+    FIELDS = ('temperature', 'feels_like', 'humidity', 'wind_speed',
+              'description', 'country')
+
+    # Fields query() can read straight from columns without parsing JSON
+    QUERY_COLUMNS = ('timestamp', 'ts') + FIELDS
+
+    def __init__(self, filename: str, write_behind: bool = False,
+                 batch_size: int = 100, flush_interval: float = 1.0):
+        """
+        Open (or create) the weather history store
+
+        Args:
+            filename: Database path, or a legacy JSON history file to migrate
+            write_behind: Buffer saves and commit them from a background thread
+            batch_size: Buffered records that trigger an immediate commit
+            flush_interval: Maximum seconds a buffered record waits to commit
+        """
+        if filename.endswith('.json'):
+            self.legacy_filename = filename
+            self.filename = os.path.splitext(filename)[0] + '.db'
+        else:
+            self.legacy_filename = None
+            self.filename = filename
+
+        self._lock = threading.RLock()
+        self.strings = StringTable()  # Shared by every series loaded from here
+        self._conn = sqlite3.connect(self.filename, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # fsync on every commit so an acknowledged batch survives a crash
+        self._conn.execute("PRAGMA synchronous=FULL")
         self.ensure_file_exists()
     
+        if self.legacy_filename and os.path.exists(self.legacy_filename):
+            self.migrate_json(self.legacy_filename)
+
+        # Write-behind buffer and the thread that commits it
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closing = False
+        self._writer = None
+        if write_behind:
+            self._writer = threading.Thread(
+                target=self._writer_loop,
+                name="StorageWriter",
+                daemon=True
+            )
+            self._writer.start()
+
     def ensure_file_exists(self):
-        """Create storage file if it doesn't exist"""
-        if not os.path.exists(self.filename):
-            with open(self.filename, 'w') as file:
-                json.dump({}, file)
+        """Create storage tables and indexes if they don't exist"""
+        with self._lock:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS observations (
+                       id INTEGER PRIMARY KEY AUTOINCREMENT,
+                       city TEXT NOT NULL,
+                       ts REAL NOT NULL,
+                       timestamp TEXT NOT NULL,
+                       temperature REAL,
+                       feels_like REAL,
+                       humidity REAL,
+                       wind_speed REAL,
+                       description TEXT,
+                       country TEXT,
+                       data TEXT NOT NULL
+                   )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_observations_city_ts "
+                "ON observations (city, ts)"
+            )
+
+            has_aggregates = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'aggregates'"
+            ).fetchone()
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS aggregates (
+                       city TEXT NOT NULL,
+                       period TEXT NOT NULL,
+                       bucket INTEGER NOT NULL,
+                       metric TEXT NOT NULL,
+                       count INTEGER NOT NULL,
+                       total REAL NOT NULL,
+                       total_sq REAL NOT NULL,
+                       min REAL,
+                       max REAL,
+                       PRIMARY KEY (city, period, bucket, metric)
+                   )"""
+            )
+            self._conn.commit()
+
+            # Databases created before aggregates existed need a backfill
+            if not has_aggregates:
+                self.rebuild_aggregates()
+
+    def rebuild_aggregates(self):
+        """Recompute all running aggregates from the stored observations"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM aggregates")
+                for period, size in PERIODS.items():
+                    bucket = "0" if size is None else f"CAST(ts / {size} AS INTEGER)"
+                    group = "city" if size is None else f"city, {bucket}"
+                    for metric in AGGREGATE_METRICS:
+                        self._conn.execute(
+                            f"""INSERT INTO aggregates
+                                SELECT city, ?, {bucket}, ?, COUNT({metric}),
+                                       TOTAL({metric}), TOTAL({metric} * {metric}),
+                                       MIN({metric}), MAX({metric})
+                                FROM observations
+                                WHERE typeof({metric}) IN ('integer', 'real')
+                                GROUP BY {group}""",
+                            (period, metric)
+                        )
+
+    @staticmethod
+    def _parse_timestamp(timestamp: Any) -> float:
+        """Convert a stored ISO timestamp to epoch seconds"""
+        try:
+            return datetime.fromisoformat(str(timestamp)).timestamp()
+        except ValueError:
+            return datetime.now().timestamp()
+
+    def _row_values(self, city: str, data: Dict[str, Any]) -> Tuple:
+        """Build the observations row for one record"""
+        timestamp = data.get('timestamp') or datetime.now().isoformat()
+        return (
+            city,
+            self._parse_timestamp(timestamp),
+            timestamp,
+            *(data.get(field) for field in self.FIELDS),
+            json.dumps(data)
+        )
+
+    def _insert_records(self, records: Iterable[Tuple[str, Dict[str, Any]]]):
+        """Insert (city, data) records and update aggregates in the current transaction"""
+        rows = [self._row_values(city, data) for city, data in records]
+        self._conn.executemany(
+            "INSERT INTO observations (city, ts, timestamp, temperature, feels_like, "
+            "humidity, wind_speed, description, country, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+        # Fold the batch into per-bucket stats first so each bucket is
+        # written once per commit
+        pending: Dict[Tuple[str, str, int, str], RunningStats] = {}
+        metric_index = [(metric, 3 + self.FIELDS.index(metric)) for metric in AGGREGATE_METRICS]
+        for row in rows:
+            city, ts = row[0], row[1]
+            for metric, index in metric_index:
+                value = row[index]
+                if not isinstance(value, (int, float)) or isinstance(value, bool) or value != value:
+                    continue
+                for period in PERIODS:
+                    key = (city, period, bucket_for(period, ts), metric)
+                    stats = pending.get(key)
+                    if stats is None:
+                        stats = pending[key] = RunningStats()
+                    stats.update(value)
+
+        self._conn.executemany(
+            """INSERT INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (city, period, bucket, metric) DO UPDATE SET
+                   count = count + excluded.count,
+                   total = total + excluded.total,
+                   total_sq = total_sq + excluded.total_sq,
+                   min = MIN(min, excluded.min),
+                   max = MAX(max, excluded.max)""",
+            [(*key, stats.count, stats.total, stats.total_sq, stats.min, stats.max)
+             for key, stats in pending.items()]
+        )
+
+    def migrate_json(self, json_filename: str) -> int:
+        """
+        Import a legacy JSON history file and set it aside
+
+        The file is renamed with a ``.migrated`` suffix once its records
+        have been committed, so the import only ever runs once.
+
+        Args:
+            json_filename: Path of the {city: [records]} JSON file
+
+        Returns:
+            Number of records imported
+        """
+        try:
+            with open(json_filename, 'r') as file:
+                all_data = json.load(file)
+
+            records = [(city, entry)
+                       for city, entries in all_data.items()
+                       for entry in entries]
+
+            with self._lock:
+                with self._conn:
+                    self._insert_records(records)
+
+            os.replace(json_filename, json_filename + '.migrated')
+            print(f"Migrated {len(records)} records from {json_filename}")
+            return len(records)
+
+        except Exception as e:
+            print(f"Error migrating weather history: {e}")
+            return 0
     
     def save_weather(self, city: str, data: Dict[str, Any]) -> bool:
         """
@@ -34,25 +251,92 @@ class StorageManager:
             # Add timestamp
             data['timestamp'] = datetime.now().isoformat()
             
-            # Load existing data
-            with open(self.filename, 'r') as file:
-                all_data = json.load(file)
-            
-            # Add or update city data
-            if city not in all_data:
-                all_data[city] = []
+            if self._writer is not None:
+                self._enqueue([(city, data)])
+                return True
             
-            all_data[city].append(data)
-            
-            # Save back to file
-            with open(self.filename, 'w') as file:
-                json.dump(all_data, file, indent=2)
+            # Append a single row; existing history is never rewritten
+            with self._lock:
+                with self._conn:
+                    self._insert_records([(city, data)])
                 
             return True
         
         except Exception as e:
             print(f"Error saving weather data: {e}")
             return False
+
+    def save_many(self, records: Iterable[Tuple[str, Dict[str, Any]]]) -> bool:
+        """
+        Save several observations in a single commit
+
+        Records without a 'timestamp' are stamped with the current time.
+
+        Args:
+            records: (city, data) pairs to save
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            now = datetime.now().isoformat()
+            batch = []
+            for city, data in records:
+                data.setdefault('timestamp', now)
+                batch.append((city, data))
+
+            if self._writer is not None:
+                self._enqueue(batch)
+                return True
+
+            with self._lock:
+                with self._conn:
+                    self._insert_records(batch)
+
+            return True
+
+        except Exception as e:
+            print(f"Error saving weather data: {e}")
+            return False
+
+    def _enqueue(self, records: List[Tuple[str, Dict[str, Any]]]):
+        """Add records to the write-behind buffer"""
+        with self._pending_lock:
+            self._pending.extend(records)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def _writer_loop(self):
+        """Commit buffered records on a size or time threshold"""
+        while not self._closing:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> bool:
+        """
+        Commit all buffered records in one transaction
+
+        Returns:
+            True if the buffer was written (or empty), False on error
+        """
+        with self._lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return True
+
+            try:
+                with self._conn:
+                    self._insert_records(batch)
+                return True
+            except Exception as e:
+                # Keep the records so the next flush retries them
+                with self._pending_lock:
+                    self._pending[:0] = batch
+                print(f"Error flushing weather data: {e}")
+                return False
     
     def load_history(self, city: str) -> List[Dict[str, Any]]:
         """
@@ -65,22 +349,198 @@ class StorageManager:
             List of historical weather data entries
         """
         try:
-            with open(self.filename, 'r') as file:
-                all_data = json.load(file)
+            self.flush()
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT data FROM observations WHERE city = ? ORDER BY ts, id",
+                    (city,)
+                ).fetchall()
                 
-            return all_data.get(city, [])
+            return [json.loads(row[0]) for row in rows]
         
         except Exception as e:
             print(f"Error loading weather history: {e}")
             return []
     
+    @staticmethod
+    def _to_epoch(value: Union[datetime, float, int, None]) -> Optional[float]:
+        """Normalize a datetime or epoch seconds value for range queries"""
+        if value is None or isinstance(value, (int, float)):
+            return value
+        return value.timestamp()
+
+    def _select_range(self, city: str, columns: Sequence[str],
+                      start: Union[datetime, float, None] = None,
+                      end: Union[datetime, float, None] = None,
+                      limit: Optional[int] = None) -> List[Tuple]:
+        """Read raw column tuples for a city's time window, oldest first"""
+        sql = f"SELECT {', '.join(columns)} FROM observations WHERE city = ?"
+        params = [city]
+        if start is not None:
+            sql += " AND ts >= ?"
+            params.append(self._to_epoch(start))
+        if end is not None:
+            sql += " AND ts < ?"
+            params.append(self._to_epoch(end))
+        if limit is not None:
+            # Newest rows first so LIMIT keeps the most recent ones
+            sql += " ORDER BY ts DESC, id DESC LIMIT ?"
+            params.append(limit)
+        else:
+            sql += " ORDER BY ts, id"
+
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        if limit is not None:
+            rows.reverse()
+        return rows
+
+    def query(self, city: str, start: Union[datetime, float, None] = None,
+              end: Union[datetime, float, None] = None,
+              fields: Optional[Sequence[str]] = None, limit: Optional[int] = None,
+              columnar: bool = False) -> Union[List[Dict[str, Any]], Dict[str, List[Any]]]:
+        """
+        Get stored observations for a city within a time window
+
+        Only rows inside the window are read, using the (city, ts) index.
+
+        Args:
+            city: The city name
+            start: Earliest time to include (datetime or epoch seconds)
+            end: Time to stop before (datetime or epoch seconds)
+            fields: Fields to return (all stored fields if None); 'ts' gives
+                the timestamp as epoch seconds
+            limit: Return only the most recent N matching observations
+            columnar: Return {field: [values]} instead of a list of dicts
+
+        Returns:
+            Observations in time order, as records or columns
+        """
+        try:
+            direct = fields is not None and all(f in self.QUERY_COLUMNS for f in fields)
+            columns = fields if direct else ('ts', 'data')
+            rows = self._select_range(city, columns, start, end, limit)
+
+            if direct:
+                if columnar:
+                    return {field: [row[i] for row in rows]
+                            for i, field in enumerate(fields)}
+                return [dict(zip(fields, row)) for row in rows]
+
+            records = [json.loads(data) for _, data in rows]
+            if fields is not None:
+                records = [{field: ts if field == 'ts' else record.get(field)
+                            for field in fields}
+                           for (ts, _), record in zip(rows, records)]
+            if columnar:
+                keys = fields if fields is not None else list(
+                    dict.fromkeys(key for record in records for key in record))
+                return {key: [record.get(key) for record in records] for key in keys}
+            return records
+
+        except Exception as e:
+            print(f"Error querying weather history: {e}")
+            return {} if columnar else []
+
+    def load_series(self, city: str, start: Union[datetime, float, None] = None,
+                    end: Union[datetime, float, None] = None) -> HistorySeries:
+        """
+        Get a city's observations as a compact column-oriented series
+
+        Rows are read straight from the stored columns into arrays, without
+        building a dict per observation.
+
+        Args:
+            city: The city name
+            start: Earliest time to include (datetime or epoch seconds)
+            end: Time to stop before (datetime or epoch seconds)
+
+        Returns:
+            HistorySeries in time order (empty on error)
+        """
+        series = HistorySeries(city, self.strings)
+        try:
+            for row in self._select_range(city, ('ts',) + self.FIELDS, start, end):
+                series.append_row(*row)
+        except Exception as e:
+            print(f"Error loading weather history: {e}")
+            return HistorySeries(city, self.strings)
+        return series
+
+    def get_aggregates(self, city: str, period: str = 'all',
+                       start: Union[datetime, float, None] = None,
+                       end: Union[datetime, float, None] = None) -> Dict[Any, Any]:
+        """
+        Get precomputed running aggregates for a city
+
+        Args:
+            city: The city name
+            period: 'all' for lifetime totals, or 'hour'/'day' for buckets
+            start: For bucketed periods, earliest bucket time to include
+            end: For bucketed periods, time to stop before
+
+        Returns:
+            For 'all': {metric: RunningStats}. For 'hour'/'day':
+            {bucket start as epoch seconds: {metric: RunningStats}} in time
+            order. Day buckets are UTC days.
+        """
+        if period not in PERIODS:
+            raise ValueError(f"Unknown aggregate period: {period}")
+
+        sql = ("SELECT bucket, metric, count, total, total_sq, min, max "
+               "FROM aggregates WHERE city = ? AND period = ?")
+        params = [city, period]
+        if period != 'all':
+            if start is not None:
+                sql += " AND bucket >= ?"
+                params.append(bucket_for(period, self._to_epoch(start)))
+            if end is not None:
+                sql += " AND bucket < ?"
+                params.append(bucket_for(period, self._to_epoch(end)))
+        sql += " ORDER BY bucket"
+
+        try:
+            self.flush()
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+        except Exception as e:
+            print(f"Error loading weather aggregates: {e}")
+            return {}
+
+        if period == 'all':
+            return {metric: RunningStats(*values) for _, metric, *values in rows}
+
+        size = PERIODS[period]
+        buckets: Dict[float, Dict[str, RunningStats]] = {}
+        for bucket, metric, *values in rows:
+            buckets.setdefault(bucket * float(size), {})[metric] = RunningStats(*values)
+        return buckets
+
     def get_all_weather(self):
         """Get all stored weather data"""
         try:
-            if os.path.exists(self.filename):
-                with open(self.filename, 'r') as file:
-                    return json.load(file)
-            return {}
+            self.flush()
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT city, data FROM observations ORDER BY id"
+                ).fetchall()
+
+            all_data = {}
+            for city, data in rows:
+                all_data.setdefault(city, []).append(json.loads(data))
+            return all_data
         except Exception as e:
             print(f"Error retrieving weather data: {e}")
-            return {}
\ No newline at end of file
+            return {}
+
+    def close(self):
+        """Flush buffered records, stop the writer and close the database"""
+        self._closing = True
+        if self._writer is not None:
+            self._wake.set()
+            self._writer.join()
+            self._writer = None
+        self.flush()
+        with self._lock:
+            self._conn.close()
@@ -4,10 +4,13 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Dict, Any, List, Callable
 
+from gui.background import TaskRunner
+
 class CityComparison:
     """Allows comparing weather data between two or more cities"""
     
-    def __init__(self, parent, api_callback: Callable, processor_callback: Callable):
+    def __init__(self, parent, api_callback: Callable, processor_callback: Callable,
+                 runner: TaskRunner = None):
         """
         Initialize city comparison feature
         
@@ -15,11 +18,14 @@ class CityComparison:
             parent: Parent frame to place the comparison widget
             api_callback: Function to call to fetch weather data
             processor_callback: Function to process API responses
+            runner: Background task runner for API calls
         """
         self.parent = parent
         self.api_callback = api_callback
         self.processor_callback = processor_callback
+        self.runner = runner or TaskRunner()
         self.cities = []  # List to store city data
+        self.pending = {}  # Lowercase city name -> name as entered, while loading
         
         self.create_widgets()
     
@@ -42,6 +48,11 @@ class CityComparison:
         clear_button = ttk.Button(entry_frame, text="Clear All", command=self.clear_cities)
         clear_button.pack(side=tk.LEFT, padx=5)
         
+        # Loading status for cities still being fetched
+        self.status_var = tk.StringVar()
+        status_label = ttk.Label(entry_frame, textvariable=self.status_var)
+        status_label.pack(side=tk.LEFT, padx=10)
+        
         # Comparison table
         self.tree = ttk.Treeview(self.frame, columns=("city", "temp", "humidity", "wind"), show="headings")
         self.tree.heading("city", text="City")
@@ -64,40 +75,76 @@ class CityComparison:
             messagebox.showinfo("Input Required", "Please enter a city name")
             return
         
+        if city.lower() in self.pending:
+            messagebox.showinfo("Duplicate", f"{city} is already loading")
+            return
+        
         # Check if city already in the list
         for existing_city in self.cities:
             if existing_city['city'].lower() == city.lower():
                 messagebox.showinfo("Duplicate", f"{city} is already in the comparison")
                 return
         
-        # Fetch weather data
+        # Fetch weather data in the background; each city loads independently
+        key = city.lower()
+        self.pending[key] = city
+        self.update_status()
+        self.city_entry.delete(0, tk.END)
+        self.runner.submit(
+            ("comparison", key),
+            self.api_callback,
+            city,
+            on_success=lambda weather_data: self.on_city_loaded(city, weather_data),
+            on_error=lambda e: self.on_city_failed(city, f"An error occurred: {str(e)}")
+        )
+    
+    def on_city_loaded(self, city, weather_data):
+        """Add fetched weather data for a city to the table"""
+        if self.pending.pop(city.lower(), None) is None:
+            return  # Cleared while loading
+        self.update_status()
+        
+        if not weather_data:
+            messagebox.showerror("Error", f"Could not find weather data for '{city}'")
+            return
+        
         try:
-            weather_data = self.api_callback(city)
+            # Process the data
+            processed_data = self.processor_callback(weather_data)
+            
+            # Add to cities list
+            self.cities.append(processed_data)
             
-            if weather_data:
-                # Process the data
-                processed_data = self.processor_callback(weather_data)
-                
-                # Add to cities list
-                self.cities.append(processed_data)
-                
-                # Add to tree view
-                self.tree.insert("", tk.END, values=(
-                    processed_data['city'],
-                    f"{processed_data['temperature']}°F",
-                    f"{processed_data['humidity']}%",
-                    f"{processed_data['wind_speed']} mph"
-                ))
-                
-                # Clear entry
-                self.city_entry.delete(0, tk.END)
-            else:
-                messagebox.showerror("Error", f"Could not find weather data for '{city}'")
+            # Add to tree view
+            self.tree.insert("", tk.END, values=(
+                processed_data['city'],
+                f"{processed_data['temperature']}°F",
+                f"{processed_data['humidity']}%",
+                f"{processed_data['wind_speed']} mph"
+            ))
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
     
+    def on_city_failed(self, city, message):
+        """Report a city that could not be loaded"""
+        if self.pending.pop(city.lower(), None) is None:
+            return
+        self.update_status()
+        messagebox.showerror("Error", message)
+    
+    def update_status(self):
+        """Show which cities are still loading"""
+        if self.pending:
+            self.status_var.set(f"Loading {', '.join(self.pending.values())}...")
+        else:
+            self.status_var.set("")
+    
     def clear_cities(self):
         """Clear all cities from the comparison table"""
         self.cities = []
+        for key in self.pending:
+            self.runner.cancel(("comparison", key))
+        self.pending = {}
+        self.update_status()
         for item in self.tree.get_children():
             self.tree.delete(item)
\ No newline at end of file
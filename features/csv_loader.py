@@ -0,0 +1,382 @@
+"""Parallel CSV ingestion for team weather data files"""
+
+import csv
+import hashlib
+import mmap
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Collection, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from features import csv_sidecar
+
+# Expected column types; columns missing from a file are simply ignored
+COLUMN_DTYPES = {
+    'Date': 'str',
+    'Time': 'str',
+    'City': 'str',
+    'Temperature_F': 'float64',
+    'Temerature_F': 'float64',  # Common typo, renamed after loading
+    'Humidity': 'float64',
+    'Wind_Speed': 'float64'
+}
+
+# Same, without numeric types, for files whose values don't parse as numbers
+TEXT_DTYPES = {name: dtype for name, dtype in COLUMN_DTYPES.items() if dtype == 'str'}
+
+REQUIRED_COLUMNS = ['Date', 'City']
+
+# Rows per chunk when streaming files too large to load whole
+CHUNK_ROWS = 250_000
+
+# Files larger than this (bytes) are streamed instead of loaded whole
+STREAMING_THRESHOLD = 256 * 1024 * 1024
+
+class CsvLoadResult(NamedTuple):
+    """Outcome of loading one CSV file"""
+    path: str
+    name: str
+    frame: Optional[pd.DataFrame]
+    error: Optional[str]
+    seconds: float
+    from_sidecar: bool = False  # Read from the binary cache, not parsed
+
+class _CommentFilter:
+    """Read-only text stream that drops blank and comment lines
+
+    Lets pandas parse straight from the open file while skipping lines
+    starting with '#' or '//', without building a cleaned copy first.
+    """
+
+    def __init__(self, file):
+        self._lines = (line for line in file
+                       if line.strip() and not line.lstrip().startswith(('#', '//')))
+
+    def read(self, size: int = -1) -> str:
+        if size is None or size < 0:
+            return ''.join(self._lines)
+
+        chunk = []
+        length = 0
+        for line in self._lines:
+            chunk.append(line)
+            length += len(line)
+            if length >= size:
+                break
+        return ''.join(chunk)
+
+    def __iter__(self):
+        return self._lines
+
+def _needs_line_filter(path: str) -> bool:
+    """Check whether pandas' own comment handling would misread the file
+
+    pandas skips lines starting with '#' but knows nothing about '//'
+    comments, and would cut fields at a '#' elsewhere in a line.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data.find(b'//') != -1:
+                return True
+            pos = data.find(b'#')
+            while pos != -1:
+                if pos > 0 and data[pos - 1:pos] != b'\n':
+                    return True
+                pos = data.find(b'#', pos + 1)
+            return False
+
+def _parse(path: str, dtypes: dict) -> pd.DataFrame:
+    """Parse a CSV file, skipping comment and blank lines"""
+    if not _needs_line_filter(path):
+        # Parsed entirely by the C reader, which releases the GIL
+        return pd.read_csv(path, comment='#', skip_blank_lines=True,
+                           dtype=dtypes, encoding='utf-8')
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return pd.read_csv(_CommentFilter(f), dtype=dtypes)
+
+def _normalize(df: pd.DataFrame, categorize: bool = True) -> pd.DataFrame:
+    """Clean column names and types the same way for every file"""
+    df.columns = [col.strip() for col in df.columns]
+
+    # Fix common typos in column names
+    if 'Temerature_F' in df.columns and 'Temperature_F' not in df.columns:
+        df.rename(columns={'Temerature_F': 'Temperature_F'}, inplace=True)
+
+    for name in df.columns:
+        column = df[name]
+        if COLUMN_DTYPES.get(name) == 'float64' and column.dtype != 'float64':
+            # Values that aren't numbers become NaN
+            df[name] = pd.to_numeric(column, errors='coerce')
+        elif categorize and not pd.api.types.is_numeric_dtype(column.dtype):
+            # Text columns repeat a handful of values (cities, dates)
+            df[name] = column.astype('category')
+    return df
+
+def load_csv(path: str, cache_dir: Optional[str] = None) -> CsvLoadResult:
+    """
+    Load and normalize one team CSV file
+
+    Args:
+        path: Path to the CSV file
+        cache_dir: Directory for binary copies of parsed files (see
+            features.csv_sidecar); None to always parse the CSV
+
+    Returns:
+        CsvLoadResult with the DataFrame, or an error message on failure
+    """
+    name = os.path.basename(path).replace('.csv', '')
+    start = time.perf_counter()
+
+    def failed(message):
+        return CsvLoadResult(path, name, None, message, time.perf_counter() - start)
+
+    if cache_dir:
+        df = csv_sidecar.read_sidecar(path, cache_dir)
+        if df is not None:
+            return CsvLoadResult(path, name, df, None, time.perf_counter() - start, True)
+
+    try:
+        try:
+            df = _parse(path, COLUMN_DTYPES)
+        except ValueError:
+            # A numeric column holds text; let pandas infer those types
+            df = _parse(path, TEXT_DTYPES)
+    except pd.errors.EmptyDataError:
+        return failed(f"{name} (empty file)")
+    except Exception as e:
+        return failed(f"{os.path.basename(path)} ({str(e)[:50]}...)")
+
+    df = _normalize(df)
+
+    # Check for required columns
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_cols:
+        return failed(f"{name} (missing: {', '.join(missing_cols)})")
+
+    if cache_dir:
+        csv_sidecar.write_sidecar(path, cache_dir, df)
+
+    return CsvLoadResult(path, name, df, None, time.perf_counter() - start)
+
+def load_csvs(paths: Iterable[str], max_workers: Optional[int] = None,
+              cache_dir: Optional[str] = None) -> List[CsvLoadResult]:
+    """
+    Load many CSV files in parallel
+
+    Args:
+        paths: CSV file paths
+        max_workers: Worker threads (defaults to one per CPU, at most 8)
+        cache_dir: Directory for binary copies of parsed files
+
+    Returns:
+        One CsvLoadResult per path, in the same order
+    """
+    paths = list(paths)
+    if len(paths) <= 1:
+        return [load_csv(path, cache_dir) for path in paths]
+
+    workers = max_workers or min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="CsvLoader") as pool:
+        return list(pool.map(lambda path: load_csv(path, cache_dir), paths))
+
+def iter_csv_chunks(path: str, columns: Collection[str],
+                    chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV file a chunk at a time, keeping only some columns
+
+    Chunks are normalized like load_csv's output, except that text columns
+    stay as strings. Memory use depends on chunk_rows, not the file size.
+
+    Args:
+        path: Path to the CSV file
+        columns: Column names to keep (after cleanup, so 'Temperature_F'
+            also matches the 'Temerature_F' typo)
+        chunk_rows: Rows per chunk
+
+    Yields:
+        DataFrames with the wanted columns that the file has
+    """
+    wanted = set(columns)
+    if 'Temperature_F' in wanted:
+        wanted.add('Temerature_F')
+    options = {
+        'usecols': lambda name: name.strip() in wanted,
+        'dtype': TEXT_DTYPES,
+        'chunksize': chunk_rows
+    }
+
+    if not _needs_line_filter(path):
+        with pd.read_csv(path, comment='#', skip_blank_lines=True,
+                         encoding='utf-8', **options) as reader:
+            for chunk in reader:
+                yield _normalize(chunk, categorize=False)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        with pd.read_csv(_CommentFilter(f), **options) as reader:
+            for chunk in reader:
+                yield _normalize(chunk, categorize=False)
+
+def check_header(path: str) -> Optional[str]:
+    """
+    Check that a CSV file's header has the required columns, without parsing it
+
+    Used for files too large to load, before they are streamed.
+
+    Args:
+        path: Path to the CSV file
+
+    Returns:
+        None if the header is usable, otherwise an error message in the same
+        form as CsvLoadResult.error
+    """
+    name = os.path.basename(path).replace('.csv', '')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            header = next(iter(_CommentFilter(f)), None)
+    except Exception as e:
+        return f"{os.path.basename(path)} ({str(e)[:50]}...)"
+
+    if header is None:
+        return f"{name} (empty file)"
+
+    columns = [col.strip() for col in next(csv.reader([header]))]
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing_cols:
+        return f"{name} (missing: {', '.join(missing_cols)})"
+    return None
+
+class FileSignature(NamedTuple):
+    """What identifies one version of a file on disk"""
+    mtime_ns: int
+    size: int
+    digest: Optional[str]
+
+def file_digest(path: str) -> str:
+    """Hash a file's contents (BLAKE2b, hex)"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class CsvCache:
+    """Keeps parsed CSV files and re-parses only the ones that changed
+
+    Files are matched on path, modification time and size. With
+    ``verify_hash`` set, a file whose mtime changed but whose size didn't
+    is hashed, and kept if the contents are the same (e.g. after a copy
+    or ``touch``).
+    """
+
+    def __init__(self, verify_hash: bool = False, cache_dir: Optional[str] = None):
+        """
+        Create an empty cache
+
+        Args:
+            verify_hash: Hash files to confirm changes before re-parsing
+            cache_dir: Directory for binary copies of parsed files
+        """
+        self.verify_hash = verify_hash
+        self.cache_dir = cache_dir
+        self.entries: Dict[str, Tuple[FileSignature, CsvLoadResult]] = {}
+        self.parsed = 0
+        self.reused = 0
+        self.evicted = 0
+        self.last_parsed: List[str] = []  # Paths parsed by the latest load()
+
+    def _signature(self, path: str, previous: Optional[FileSignature]) -> Optional[FileSignature]:
+        """Get the current signature of a file, or None if it can't be read"""
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+
+        digest = None
+        if self.verify_hash and previous is not None:
+            if (previous.mtime_ns, previous.size) == (info.st_mtime_ns, info.st_size):
+                digest = previous.digest
+            elif previous.size == info.st_size:
+                try:
+                    digest = file_digest(path)
+                except OSError:
+                    return None
+        return FileSignature(info.st_mtime_ns, info.st_size, digest)
+
+    def _unchanged(self, previous: FileSignature, current: FileSignature) -> bool:
+        """Check whether a file still matches its cached version"""
+        if (previous.mtime_ns, previous.size) == (current.mtime_ns, current.size):
+            return True
+        return (current.digest is not None and previous.digest == current.digest)
+
+    def load(self, paths: Iterable[str], max_workers: Optional[int] = None) -> List[CsvLoadResult]:
+        """
+        Load CSV files, parsing only new or changed ones
+
+        Cached files that aren't in ``paths`` are evicted.
+
+        Args:
+            paths: CSV file paths
+            max_workers: Worker threads for parsing (see load_csvs)
+
+        Returns:
+            One CsvLoadResult per path, in the same order
+        """
+        paths = list(dict.fromkeys(paths))
+        results: Dict[str, CsvLoadResult] = {}
+        signatures: Dict[str, Optional[FileSignature]] = {}
+        stale = []
+
+        for path in paths:
+            cached = self.entries.get(path)
+            signature = self._signature(path, cached[0] if cached else None)
+            if cached and signature and self._unchanged(cached[0], signature):
+                results[path] = cached[1]
+                # Remember the new mtime so the file isn't hashed again
+                self.entries[path] = (signature, cached[1])
+            else:
+                signatures[path] = signature
+                stale.append(path)
+
+        for result in load_csvs(stale, max_workers, self.cache_dir):
+            results[result.path] = result
+            signature = signatures[result.path]
+            if signature is None:
+                # Unreadable files are retried on the next load
+                self.entries.pop(result.path, None)
+                continue
+            if self.verify_hash and signature.digest is None:
+                try:
+                    signature = signature._replace(digest=file_digest(result.path))
+                except OSError:
+                    pass
+            self.entries[result.path] = (signature, result)
+
+        removed = [path for path in self.entries if path not in results]
+        for path in removed:
+            del self.entries[path]
+
+        self.last_parsed = stale
+        self.parsed += len(stale)
+        self.reused += len(paths) - len(stale)
+        self.evicted += len(removed)
+        return [results[path] for path in paths]
+
+    def clear(self):
+        """Drop all cached files"""
+        self.entries.clear()
+        self.last_parsed = []
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters"""
+        return {
+            'files': len(self.entries),
+            'parsed': self.parsed,
+            'reused': self.reused,
+            'evicted': self.evicted
+        }
@@ -0,0 +1,149 @@
+"""Binary columnar copies of normalized team CSV files
+
+Each parsed CSV can be written next to the data as a sidecar file in
+Feather format (when pyarrow is installed) or as an uncompressed NumPy
+``.npz`` archive. The sidecar name includes the source file's mtime and
+size, so editing the CSV makes the old sidecar unreachable; it is
+deleted the next time the file is cached.
+"""
+
+import hashlib
+import json
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+FORMAT = 'feather' if feather is not None else 'npz'
+EXTENSION = '.' + FORMAT
+
+def _prefix(path: str) -> str:
+    """Sidecar name prefix shared by every version of one source file"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    location = hashlib.blake2b(os.path.abspath(path).encode('utf-8'), digest_size=6)
+    return f"{name}-{location.hexdigest()}-"
+
+def sidecar_path(path: str, cache_dir: str) -> Optional[str]:
+    """
+    Get the sidecar file name for the current version of a CSV file
+
+    Args:
+        path: Source CSV path
+        cache_dir: Directory holding sidecar files
+
+    Returns:
+        Sidecar path, or None if the source file can't be read
+    """
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    name = f"{_prefix(path)}{info.st_mtime_ns}-{info.st_size}{EXTENSION}"
+    return os.path.join(cache_dir, name)
+
+def read_sidecar(path: str, cache_dir: str) -> Optional[pd.DataFrame]:
+    """
+    Load the sidecar for a CSV file if it's up to date
+
+    Args:
+        path: Source CSV path
+        cache_dir: Directory holding sidecar files
+
+    Returns:
+        DataFrame, or None if there is no current sidecar
+    """
+    target = sidecar_path(path, cache_dir)
+    if target is None or not os.path.exists(target):
+        return None
+
+    try:
+        if FORMAT == 'feather':
+            return feather.read_table(target, memory_map=True).to_pandas()
+        return _read_npz(target)
+    except Exception as e:
+        print(f"Error reading cached copy of {os.path.basename(path)}: {e}")
+        return None
+
+def write_sidecar(path: str, cache_dir: str, df: pd.DataFrame) -> Optional[str]:
+    """
+    Save a normalized DataFrame as the sidecar for a CSV file
+
+    Older sidecars of the same file are removed.
+
+    Args:
+        path: Source CSV path
+        cache_dir: Directory holding sidecar files
+        df: Normalized DataFrame (numeric or categorical columns)
+
+    Returns:
+        Sidecar path, or None on error
+    """
+    target = sidecar_path(path, cache_dir)
+    if target is None:
+        return None
+
+    temp_path = f"{target}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        if FORMAT == 'feather':
+            feather.write_feather(df, temp_path, compression='uncompressed')
+        else:
+            _write_npz(temp_path, df)
+        os.replace(temp_path, target)
+    except Exception as e:
+        print(f"Error caching {os.path.basename(path)}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return None
+
+    _remove_stale(path, cache_dir, keep=os.path.basename(target))
+    return target
+
+def _remove_stale(path: str, cache_dir: str, keep: str):
+    """Delete sidecars of earlier versions of a CSV file"""
+    prefix = _prefix(path)
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and name != keep and not name.endswith('.tmp'):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+
+def _write_npz(target: str, df: pd.DataFrame):
+    """Store columns as arrays; categorical columns as codes plus categories"""
+    arrays = {}
+    columns = []
+    for i, (name, column) in enumerate(df.items()):
+        key = f"c{i}"
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            arrays[key] = column.cat.codes.to_numpy()
+            arrays[key + "_categories"] = np.asarray(column.cat.categories, dtype=str)
+            columns.append([name, 'category'])
+        else:
+            arrays[key] = column.to_numpy()
+            columns.append([name, 'array'])
+    arrays['columns'] = np.array(json.dumps(columns))
+
+    # np.savez adds '.npz' to names without it
+    with open(target, 'wb') as f:
+        np.savez(f, **arrays)
+
+def _read_npz(target: str) -> pd.DataFrame:
+    """Rebuild a DataFrame written by _write_npz"""
+    with np.load(target, allow_pickle=False) as data:
+        columns = json.loads(str(data['columns']))
+        frame = {}
+        for i, (name, kind) in enumerate(columns):
+            key = f"c{i}"
+            if kind == 'category':
+                frame[name] = pd.Categorical.from_codes(
+                    data[key], categories=data[key + "_categories"].astype(object))
+            else:
+                frame[name] = data[key]
+    return pd.DataFrame(frame)
@@ -0,0 +1,373 @@
+"""Per-city aggregation of team CSV data with a single groupby"""
+
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from features.csv_loader import CHUNK_ROWS, iter_csv_chunks
+
+# Metric columns the comparison charts can show
+METRICS = ('Temperature_F', 'Humidity', 'Wind_Speed')
+
+# Box plot whisker reach, as a multiple of the interquartile range
+WHISKER_IQR = 1.5
+
+# Histogram bin width per metric for streamed quantiles (in metric units)
+BIN_WIDTHS = {
+    'Temperature_F': 0.1,
+    'Humidity': 0.1,
+    'Wind_Speed': 0.1
+}
+
+class MetricAggregator(ABC):
+    """Abstract base class for per-city metric summaries
+
+    Subclasses compute one metric's summary in _summarize(); each summary
+    is computed once and kept until the aggregator is dropped.
+    """
+
+    def __init__(self, metrics: Sequence[str] = METRICS):
+        """
+        Set up the per-metric summary cache
+
+        Args:
+            metrics: Metric columns to summarize
+        """
+        self.metrics = tuple(metrics)
+        self._summaries: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def summarize(self, metric: str) -> Optional[Dict[str, Any]]:
+        """
+        Get per-city statistics for one metric
+
+        Args:
+            metric: Metric column name
+
+        Returns:
+            Dictionary with 'cities' (list of names, in order of first
+            appearance) and NumPy arrays 'count', 'mean', 'min', 'max', 'q1',
+            'median', 'q3', 'whislo' and 'whishi', plus 'fliers' (one array
+            of outlying values per city); None if no city has the metric
+        """
+        if metric not in self._summaries:
+            self._summaries[metric] = self._summarize(metric)
+        return self._summaries[metric]
+
+    @abstractmethod
+    def _summarize(self, metric: str) -> Optional[Dict[str, Any]]:
+        """Compute summarize() for one metric"""
+        pass
+
+    def box_stats(self, metric: str) -> List[Dict[str, Any]]:
+        """
+        Get box plot statistics in the format taken by Axes.bxp
+
+        Args:
+            metric: Metric column name
+
+        Returns:
+            One statistics dictionary per city (empty if no data)
+        """
+        summary = self.summarize(metric)
+        if summary is None:
+            return []
+
+        return [{
+            'label': city,
+            'mean': summary['mean'][i],
+            'med': summary['median'][i],
+            'q1': summary['q1'][i],
+            'q3': summary['q3'][i],
+            'whislo': summary['whislo'][i],
+            'whishi': summary['whishi'][i],
+            'fliers': summary['fliers'][i]
+        } for i, city in enumerate(summary['cities'])]
+
+class TeamAggregator(MetricAggregator):
+    """Summarizes metrics by city across all loaded team files
+
+    The files are concatenated once, on first use, into a frame holding
+    only City (categorical) and the metric columns. Each metric is then
+    summarized with one groupby.
+    """
+
+    def __init__(self, frames: Mapping[str, pd.DataFrame], metrics: Sequence[str] = METRICS):
+        """
+        Create an aggregator over loaded files
+
+        Args:
+            frames: {file name: DataFrame with a 'City' column}
+            metrics: Metric columns to keep
+        """
+        super().__init__(metrics)
+        self.frames = frames
+        self._combined: Optional[pd.DataFrame] = None
+
+    def combined(self) -> pd.DataFrame:
+        """Get City and metric columns of every file as one frame"""
+        if self._combined is None:
+            parts = []
+            for df in self.frames.values():
+                columns = ['City'] + [m for m in self.metrics if m in df.columns]
+                if len(columns) > 1:
+                    parts.append(df[columns])
+
+            if parts:
+                combined = pd.concat(parts, ignore_index=True)
+            else:
+                combined = pd.DataFrame({'City': []})
+            for metric in self.metrics:
+                if metric not in combined.columns:
+                    combined[metric] = np.nan
+            # Files with different cities concatenate as object; recode once
+            combined['City'] = combined['City'].astype('category')
+            self._combined = combined
+        return self._combined
+
+    def _summarize(self, metric: str) -> Optional[Dict[str, Any]]:
+        """Compute summarize() for one metric"""
+        combined = self.combined()
+        if metric not in combined.columns:
+            return None
+
+        data = combined[['City', metric]].dropna()
+        if data.empty:
+            return None
+
+        grouped = data.groupby('City', observed=True, sort=False)[metric]
+        table = grouped.agg(['count', 'mean', 'min', 'max'])
+        quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+        table['q1'] = quartiles[0.25]
+        table['median'] = quartiles[0.5]
+        table['q3'] = quartiles[0.75]
+
+        # Whiskers reach the furthest values within 1.5 IQR of the box
+        reach = WHISKER_IQR * (table['q3'] - table['q1'])
+        low = data['City'].map(table['q1'] - reach).astype(float)
+        high = data['City'].map(table['q3'] + reach).astype(float)
+        inside = (data[metric] >= low) & (data[metric] <= high)
+        whiskers = data[inside].groupby('City', observed=True)[metric].agg(['min', 'max'])
+        table['whislo'] = whiskers['min']
+        table['whishi'] = whiskers['max']
+
+        outliers = {city: values.to_numpy() for city, values in
+                    data[~inside].groupby('City', observed=True)[metric]}
+        empty = np.empty(0)
+
+        summary = {'cities': [str(city) for city in table.index]}
+        for column in ('count', 'mean', 'min', 'max', 'q1', 'median', 'q3',
+                       'whislo', 'whishi'):
+            summary[column] = table[column].to_numpy(dtype=float)
+        summary['fliers'] = [outliers.get(city, empty) for city in table.index]
+        return summary
+
+class _MetricAccumulator:
+    """Per-city running stats and histogram for one metric, as arrays
+
+    Histogram counts are kept sparse: sorted int64 keys holding the city id
+    in the high 32 bits and the offset bin number in the low 32 bits.
+    """
+
+    __slots__ = ('width', 'count', 'total', 'minimum', 'maximum', 'keys', 'counts')
+
+    def __init__(self, width: float):
+        self.width = width
+        self.count = np.zeros(0)
+        self.total = np.zeros(0)
+        self.minimum = np.zeros(0)
+        self.maximum = np.zeros(0)
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0)
+
+    def grow(self, size: int):
+        """Make room for city ids below size"""
+        extra = size - len(self.count)
+        if extra > 0:
+            self.count = np.concatenate([self.count, np.zeros(extra)])
+            self.total = np.concatenate([self.total, np.zeros(extra)])
+            self.minimum = np.concatenate([self.minimum, np.full(extra, np.inf)])
+            self.maximum = np.concatenate([self.maximum, np.full(extra, -np.inf)])
+
+    def add(self, ids: np.ndarray, values: np.ndarray, size: int):
+        """
+        Fold in values for the given city ids
+
+        Args:
+            ids: City id per value
+            values: Finite metric values
+            size: Number of city ids known so far
+        """
+        self.grow(size)
+        self.count += np.bincount(ids, minlength=size)
+        self.total += np.bincount(ids, weights=values, minlength=size)
+        np.minimum.at(self.minimum, ids, values)
+        np.maximum.at(self.maximum, ids, values)
+
+        keys = np.concatenate([self.keys, self._bin_key(ids, np.floor(values / self.width))])
+        weights = np.concatenate([self.counts, np.ones(len(values))])
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        self.counts = np.bincount(inverse.ravel(), weights=weights)
+
+    def _bin_key(self, ids: np.ndarray, bins: np.ndarray) -> np.ndarray:
+        """Histogram keys for bin numbers"""
+        bins = np.clip(bins, -2**31, 2**31 - 1).astype(np.int64)
+        return (ids.astype(np.int64) << 32) | (bins + 2**31)
+
+    def _center(self, index: np.ndarray) -> np.ndarray:
+        """Value at the middle of the histogram bins at index"""
+        bins = (self.keys[index] & 0xFFFFFFFF) - 2**31
+        return (bins + 0.5) * self.width
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Estimate one quantile per city from the histograms"""
+        cumulative = np.cumsum(self.counts)
+        before = cumulative - self.counts
+        ids = np.arange(len(self.count))
+        starts = np.searchsorted(self.keys, ids.astype(np.int64) << 32)
+        target = before[np.minimum(starts, len(before) - 1)] + q * self.count
+        index = np.searchsorted(cumulative, target, side='left')
+        index = np.minimum(index, len(self.keys) - 1)
+        return np.clip(self._center(index), self.minimum, self.maximum)
+
+    def whiskers(self, low: np.ndarray, high: np.ndarray):
+        """Estimate the lowest and highest values inside [low, high] per city"""
+        ids = np.arange(len(self.count))
+        first = np.searchsorted(self.keys, self._bin_key(ids, np.ceil(low / self.width - 0.5)))
+        last = np.searchsorted(self.keys, self._bin_key(ids, np.floor(high / self.width - 0.5)),
+                               side='right') - 1
+        whislo = np.where(self.minimum >= low, self.minimum,
+                          self._center(np.minimum(first, len(self.keys) - 1)))
+        whishi = np.where(self.maximum <= high, self.maximum, self._center(np.maximum(last, 0)))
+        return whislo, whishi
+
+class StreamingAggregator(MetricAggregator):
+    """Summarizes metrics by city without holding raw rows in memory
+
+    Files are read in chunks and folded into per-city running stats (count,
+    mean, min, max) and a sparse fixed-width histogram per metric. Quartiles
+    and whiskers are estimated from the histograms, so they're accurate to
+    about one bin width (see BIN_WIDTHS). Outlying values aren't kept, so
+    box plots have no fliers. Frames already in memory can be folded in
+    alongside the streamed files.
+    """
+
+    def __init__(self, frames: Mapping[str, pd.DataFrame], paths: Sequence[str],
+                 metrics: Sequence[str] = METRICS, chunk_rows: int = CHUNK_ROWS):
+        """
+        Create a streaming aggregator
+
+        Args:
+            frames: {file name: DataFrame} of files already loaded
+            paths: CSV files to stream
+            metrics: Metric columns to aggregate
+            chunk_rows: Rows read per chunk
+        """
+        super().__init__(metrics)
+        self.frames = frames
+        self.paths = list(paths)
+        self.chunk_rows = chunk_rows
+        self.errors: Dict[str, str] = {}  # Path -> message, for files that couldn't be read
+        self.rows = 0
+        self._city_ids: Dict[Any, int] = {}
+        self._accumulators: Optional[Dict[str, _MetricAccumulator]] = None
+
+    def _fold(self, chunk: pd.DataFrame, accumulators: Dict[str, _MetricAccumulator]) -> bool:
+        """
+        Add one chunk of rows to the running aggregates
+
+        Args:
+            chunk: Rows to add
+            accumulators: Running aggregates per metric
+
+        Returns:
+            False if the chunk has no City column, so nothing was added
+        """
+        if 'City' not in chunk.columns:
+            return False
+        self.rows += len(chunk)
+
+        # Give each city a stable id across chunks
+        codes, cities = pd.factorize(chunk['City'])
+        lookup = np.array([self._city_ids.setdefault(city, len(self._city_ids))
+                           for city in cities] + [-1], dtype=np.int64)
+        ids = lookup[codes]
+
+        for metric in self.metrics:
+            if metric not in chunk.columns:
+                continue
+            values = pd.to_numeric(chunk[metric], errors='coerce').to_numpy(dtype=float)
+            keep = (ids >= 0) & np.isfinite(values)
+            if keep.any():
+                accumulators[metric].add(ids[keep], values[keep], len(self._city_ids))
+        return True
+
+    @property
+    def scanned(self) -> bool:
+        """Whether scan() has run"""
+        return self._accumulators is not None
+
+    def scan(self):
+        """
+        Read every frame and file once, folding them into the aggregates
+
+        Runs on first use of summarize() if not called before. Files that
+        can't be read are recorded in errors. May run on a worker thread;
+        scanned only becomes True once every file has been read.
+        """
+        accumulators = {metric: _MetricAccumulator(BIN_WIDTHS.get(metric, 0.1))
+                        for metric in self.metrics}
+
+        for df in self.frames.values():
+            self._fold(df, accumulators)
+
+        for path in self.paths:
+            try:
+                for chunk in iter_csv_chunks(path, ('City',) + self.metrics, self.chunk_rows):
+                    if not self._fold(chunk, accumulators):
+                        name = os.path.basename(path).replace('.csv', '')
+                        self.errors[path] = f"{name} (missing: City)"
+                        break
+            except Exception as e:
+                print(f"Error streaming {path}: {e}")
+                self.errors[path] = f"{os.path.basename(path)} ({str(e)[:50]}...)"
+
+        self._accumulators = accumulators
+
+    def _summarize(self, metric: str) -> Optional[Dict[str, Any]]:
+        """Compute summarize() for one metric from the running aggregates"""
+        if not self.scanned:
+            self.scan()
+        accumulator = self._accumulators.get(metric)
+        if accumulator is None or not len(accumulator.keys):
+            return None
+
+        # Cities seen only in chunks without this metric have no data
+        accumulator.grow(len(self._city_ids))
+        present = accumulator.count > 0
+        with np.errstate(invalid='ignore'):
+            q1 = accumulator.quantile(0.25)
+            median = accumulator.quantile(0.5)
+            q3 = accumulator.quantile(0.75)
+            reach = WHISKER_IQR * (q3 - q1)
+            whislo, whishi = accumulator.whiskers(q1 - reach, q3 + reach)
+
+        cities = list(self._city_ids)
+        summary = {'cities': [str(cities[i]) for i in np.flatnonzero(present)]}
+        columns = {
+            'count': accumulator.count,
+            'mean': accumulator.total / np.maximum(accumulator.count, 1),
+            'min': accumulator.minimum,
+            'max': accumulator.maximum,
+            'q1': q1,
+            'median': median,
+            'q3': q3,
+            'whislo': whislo,
+            'whishi': whishi
+        }
+        for column, values in columns.items():
+            summary[column] = values[present]
+        summary['fliers'] = [np.empty(0) for _ in summary['cities']]
+        return summary
@@ -4,32 +4,48 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import pandas as pd
 import os
 import glob
+import time
 from typing import List, Dict
 import numpy as np
 
+from features.csv_loader import STREAMING_THRESHOLD, CsvCache, check_header
+from features.team_aggregates import StreamingAggregator, TeamAggregator
+from gui.background import TaskRunner
+from gui.charts import ChartLayer
+
 class TeamFeature:
     """Compares weather data from team members' CSV files"""
     
-    def __init__(self, parent):
+    def __init__(self, parent, runner: TaskRunner = None):
         """
         Initialize team feature
         
         Args:
             parent: Parent frame to place the team widget
+            runner: Background task runner for reading large files
         """
         self.parent = parent
+        self.runner = runner or TaskRunner()
         self.csv_files = []
         self.data_frames = {}
+        self.streamed_files = []  # Files too large to load, aggregated in chunks
+        self.streamed_signature = ()
+        self.loaded_files = []  # Names of files loaded into memory
+        self.load_timing = ""
+        self.aggregator = None
+        self.dataset_version = 0
+        self.chart_memo = {}  # (dataset version, metric) -> chart data
+        self.data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+        self.csv_cache = CsvCache(cache_dir=os.path.join(self.data_dir, ".team_cache"))
         self.current_metric = "Temperature_F"
         
         # Create widgets
         self.create_widgets()
         
-        # Auto-load and display all CSV files
-        self.auto_load_and_display()
+        # Auto-load and display all CSV files once the tab has been drawn
+        self.parent.after_idle(self.auto_load_and_display)
     
     def create_widgets(self):
         """Create the team UI widgets"""
@@ -120,24 +136,25 @@ class TeamFeature:
         self.canvas = FigureCanvasTkAgg(self.figure, graph_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
+        # Artists are created once and updated in place
+        self.layer = ChartLayer(self.ax, self.canvas)
+        self.box_summary = None  # Summary the current box plot artists show
+        self.ax.grid(True, alpha=0.3)
+        
         # Initial message
         self.show_loading_message()
     
     def show_loading_message(self):
         """Show loading message"""
-        self.ax.clear()
-        self.ax.text(0.5, 0.5, "Loading team weather data...", 
-                    ha='center', va='center', fontsize=16)
-        self.ax.axis('off')
-        self.canvas.draw()
+        self.layer.begin()
+        self.layer.message("Loading team weather data...", fontsize=16, fontweight='normal')
+        self.layer.finish(axis=False, layout=False)
     
     def auto_load_and_display(self):
         """Automatically load all CSV files from data directory and display comparison"""
         # Look for CSV files in the data directory
-        data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
-        
-        if os.path.exists(data_dir):
-            csv_files = glob.glob(os.path.join(data_dir, "*.csv"))
+        if os.path.exists(self.data_dir):
+            csv_files = glob.glob(os.path.join(self.data_dir, "*.csv"))
         else:
             csv_files = []
         
@@ -156,13 +173,12 @@ class TeamFeature:
     
     def show_no_files_message(self):
         """Show message when no CSV files are found"""
-        self.ax.clear()
-        self.ax.text(0.5, 0.6, "No CSV files found in data directory", 
-                    ha='center', va='center', fontsize=16, fontweight='bold')
-        self.ax.text(0.5, 0.4, "Click 'Add More Files' to select CSV files manually", 
-                    ha='center', va='center', fontsize=12)
-        self.ax.axis('off')
-        self.canvas.draw()
+        self.layer.begin()
+        self.layer.message("No CSV files found in data directory", y=0.6,
+                           fontsize=16, fontweight='bold')
+        self.layer.message("Click 'Add More Files' to select CSV files manually",
+                           key='hint', y=0.4, fontsize=12)
+        self.layer.finish(axis=False, layout=False)
         self.status_var.set("No files found")
         self.file_count_var.set("0 files loaded")
     
@@ -183,79 +199,110 @@ class TeamFeature:
             self.refresh_comparison()
     
     def load_data_frames(self):
-        """Load data from all CSV files into pandas DataFrames"""
+        """Load data from all CSV files into pandas DataFrames
+
+        Only files that are new or changed since the last load are parsed.
+        Files above STREAMING_THRESHOLD aren't loaded; only their header is
+        checked here, and they are read in chunks when the comparison is
+        aggregated. The dataset version is
+        bumped, dropping memoized chart data, only when the data changes.
+        """
+        previous_frames = self.data_frames
         self.data_frames = {}
         failed_files = []
         successful_files = []
         
-        for file_path in self.csv_files:
+        # Leave very large files to the streaming aggregator
+        in_memory = []
+        streamed = []
+        for path in self.csv_files:
             try:
-                # Extract filename as identifier
-                file_name = os.path.basename(file_path).replace('.csv', '')
-                
-                # Read the file, handling various comment formats
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                
-                # Skip comment lines and empty lines
-                cleaned_lines = []
-                for line in lines:
-                    stripped = line.strip()
-                    if stripped and not stripped.startswith('//') and not stripped.startswith('#'):
-                        cleaned_lines.append(line)
-                
-                if not cleaned_lines:
-                    failed_files.append(f"{file_name} (empty file)")
-                    continue
-                
-                # Create DataFrame from cleaned data
-                from io import StringIO
-                cleaned_data = StringIO(''.join(cleaned_lines))
-                df = pd.read_csv(cleaned_data)
-                
-                # Clean column names
-                df.columns = [col.strip() for col in df.columns]
-                
-                # Check for required columns
-                required_cols = ['Date', 'City']
-                missing_cols = [col for col in required_cols if col not in df.columns]
-                
-                if missing_cols:
-                    failed_files.append(f"{file_name} (missing: {', '.join(missing_cols)})")
-                    continue
-                
-                # Fix common typos in column names
-                if 'Temerature_F' in df.columns and 'Temperature_F' not in df.columns:
-                    df.rename(columns={'Temerature_F': 'Temperature_F'}, inplace=True)
-                
-                # Store the DataFrame
-                self.data_frames[file_name] = df
-                successful_files.append(file_name)
-                
-            except Exception as e:
-                failed_files.append(f"{os.path.basename(file_path)} ({str(e)[:50]}...)")
+                info = os.stat(path)
+            except OSError:
+                in_memory.append(path)  # Reported by the loader
+                continue
+            if info.st_size <= STREAMING_THRESHOLD:
+                in_memory.append(path)
+                continue
+            error = check_header(path)
+            if error:
+                failed_files.append(error)
+            else:
+                streamed.append((path, info.st_mtime_ns, info.st_size))
+        
+        # Parse new and changed files in parallel
+        started = time.perf_counter()
+        results = self.csv_cache.load(in_memory)
+        elapsed = time.perf_counter() - started
+        
+        parsed = set(self.csv_cache.last_parsed)
+        for result in results:
+            if result.path in parsed:
+                source = "cache" if result.from_sidecar else "CSV"
+                print(f"Loaded {os.path.basename(result.path)} from {source} "
+                      f"in {result.seconds * 1000:.0f} ms")
+            if result.error:
+                failed_files.append(result.error)
+                continue
+            
+            # Store the DataFrame
+            self.data_frames[result.name] = result.frame
+            successful_files.append(result.name)
         
-        # Update status
-        success_count = len(successful_files)
-        total_count = len(self.csv_files)
+        self.streamed_files = [path for path, _, _ in streamed]
         
-        self.file_count_var.set(f"{success_count} of {total_count} files loaded successfully")
+        streamed_signature = tuple(streamed)
+        if (not self.same_frames(previous_frames, self.data_frames)
+                or streamed_signature != self.streamed_signature):
+            self.streamed_signature = streamed_signature
+            self.dataset_version += 1
+            self.chart_memo.clear()
+            self.aggregator = None
+            self.runner.cancel("team_scan")
         
-        if successful_files:
-            self.status_var.set(f"Loaded: {', '.join(successful_files)}")
-        else:
-            self.status_var.set("No files loaded successfully")
+        # Update status
+        self.loaded_files = successful_files
+        self.load_timing = f"({len(parsed)} parsed, {elapsed:.2f}s)"
+        self.update_status()
         
         # Show warnings for failed files
         if failed_files:
-            warning_msg = f"Issues with {len(failed_files)} files:\n" + "\n".join(failed_files[:5])
-            if len(failed_files) > 5:
-                warning_msg += f"\n... and {len(failed_files) - 5} more"
-            messagebox.showwarning("File Loading Issues", warning_msg)
+            self.show_loading_issues(failed_files)
+    
+    def update_status(self):
+        """Show which files are loaded; streamed files count once they've been read"""
+        loaded = list(self.loaded_files)
+        pending = len(self.streamed_files)
+        if isinstance(self.aggregator, StreamingAggregator) and self.aggregator.scanned:
+            loaded.extend(f"{os.path.basename(path).replace('.csv', '')} (streamed)"
+                          for path in self.streamed_files if path not in self.aggregator.errors)
+            pending = 0
+        
+        self.file_count_var.set(
+            f"{len(loaded)} of {len(self.csv_files)} files loaded successfully {self.load_timing}")
+        
+        status = []
+        if loaded:
+            status.append(f"Loaded: {', '.join(loaded)}")
+        if pending:
+            status.append(f"Reading {pending} large file{'s' if pending > 1 else ''}...")
+        self.status_var.set("; ".join(status) or "No files loaded successfully")
+    
+    def show_loading_issues(self, failed_files):
+        """Warn about files that couldn't be loaded"""
+        warning_msg = f"Issues with {len(failed_files)} files:\n" + "\n".join(failed_files[:5])
+        if len(failed_files) > 5:
+            warning_msg += f"\n... and {len(failed_files) - 5} more"
+        messagebox.showwarning("File Loading Issues", warning_msg)
+    
+    @staticmethod
+    def same_frames(old, new):
+        """Check whether two {name: DataFrame} mappings hold the same frames"""
+        return old.keys() == new.keys() and all(old[name] is new[name] for name in new)
     
     def refresh_comparison(self):
         """Refresh the comparison visualization"""
-        if not self.data_frames:
+        if not self.data_frames and not self.streamed_files:
             self.show_no_files_message()
             return
         
@@ -263,119 +310,160 @@ class TeamFeature:
         self.current_metric = self.metric_var.get()
         chart_type = self.chart_type_var.get()
         
-        # Clear previous plot
-        self.ax.clear()
+        # Large files are read in the background; the chart is drawn after
+        aggregator = self.get_aggregator()
+        if isinstance(aggregator, StreamingAggregator) and not aggregator.scanned:
+            self.scan_streamed_files(aggregator)
+            return
         
         # Collect data for comparison
-        comparison_data = self.prepare_comparison_data()
+        summary = self.prepare_comparison_data()
         
-        if not comparison_data:
-            self.ax.text(0.5, 0.5, f"No {self.current_metric} data found in loaded files", 
-                        ha='center', va='center', fontsize=14)
-            self.ax.axis('off')
-            self.canvas.draw()
+        self.layer.begin()
+        if summary is None:
+            self.layer.message(f"No {self.current_metric} data found in loaded files",
+                               fontsize=14, fontweight='normal')
+            self.layer.finish(axis=False, layout=False)
             return
         
         # Create the appropriate chart
         if chart_type == "Bar Chart":
-            self.create_bar_chart(comparison_data)
+            self.create_bar_chart(summary)
         elif chart_type == "Line Chart":
-            self.create_line_chart(comparison_data)
+            self.create_line_chart(summary)
         elif chart_type == "Box Plot":
-            self.create_box_plot(comparison_data)
+            self.create_box_plot(summary)
         
-        self.canvas.draw()
+        # Shared axis setup; the layout is only redone when labels change
+        positions = range(len(summary['cities']))
+        self.ax.set_xticks(positions, labels=summary['cities'], rotation=45, ha='right')
+        self.ax.set_ylabel(self.get_metric_label())
+        self.ax.set_xlabel('Cities')
+        self.layer.finish()
     
     def prepare_comparison_data(self):
-        """Prepare data for comparison visualization"""
-        comparison_data = {}
+        """
+        Prepare data for comparison visualization
+
+        Results are memoized per (dataset version, metric), so switching
+        chart type or going back to an earlier metric only redraws.
+
+        Returns:
+            Per-city summary of the current metric from TeamAggregator.summarize
+            plus 'box_stats' for Axes.bxp, or None if no file has data for it
+        """
+        key = (self.dataset_version, self.current_metric)
+        if key in self.chart_memo:
+            return self.chart_memo[key]
         
-        for file_name, df in self.data_frames.items():
-            if self.current_metric not in df.columns:
-                continue
-            
-            # Group by city and calculate averages
-            for city in df['City'].unique():
-                city_data = df[df['City'] == city]
-                metric_values = city_data[self.current_metric].dropna()
-                
-                if len(metric_values) > 0:
-                    city_key = f"{city}"
-                    if city_key not in comparison_data:
-                        comparison_data[city_key] = []
-                    
-                    # Add all values for this city from this file
-                    comparison_data[city_key].extend(metric_values.tolist())
-        
-        return comparison_data
+        aggregator = self.get_aggregator()
+        summary = aggregator.summarize(self.current_metric)
+        if summary is not None:
+            summary = dict(summary, box_stats=aggregator.box_stats(self.current_metric))
+        
+        self.chart_memo[key] = summary
+        return summary
     
-    def create_bar_chart(self, data):
+    def get_aggregator(self):
+        """Get the aggregator for the loaded files, creating it if needed"""
+        if self.aggregator is None:
+            if self.streamed_files:
+                self.aggregator = StreamingAggregator(self.data_frames, self.streamed_files)
+            else:
+                self.aggregator = TeamAggregator(self.data_frames)
+        return self.aggregator
+    
+    def scan_streamed_files(self, aggregator):
+        """Read the streamed files on a worker thread, then draw the comparison"""
+        self.show_loading_message()
+        if self.runner.is_pending("team_scan"):
+            return  # Already reading; the chart is drawn when it's done
+        
+        self.runner.submit(
+            "team_scan",
+            aggregator.scan,
+            on_success=lambda _: self.on_scan_finished(aggregator),
+            on_error=self.on_scan_failed
+        )
+    
+    def on_scan_finished(self, aggregator):
+        """Report streamed files that couldn't be read and draw the comparison"""
+        if aggregator is not self.aggregator:
+            return
+        self.update_status()
+        if aggregator.errors:
+            self.show_loading_issues(list(aggregator.errors.values()))
+        self.refresh_comparison()
+    
+    def on_scan_failed(self, error):
+        """Show an error in place of the chart when reading large files fails"""
+        print(f"Error reading large team files: {error}")
+        self.aggregator = None
+        self.layer.begin()
+        self.layer.message(f"Error reading large files\n{str(error)}",
+                           fontsize=14, fontweight='normal')
+        self.layer.finish(axis=False, layout=False)
+    
+    def create_bar_chart(self, summary):
         """Create a bar chart comparison"""
-        cities = list(data.keys())
-        avg_values = [np.mean(values) for values in data.values()]
+        avg_values = summary['mean']
         
-        bars = self.ax.bar(cities, avg_values, color='skyblue', alpha=0.8, edgecolor='navy')
+        bars = self.layer.bars('bars', avg_values, color='skyblue', alpha=0.8, edgecolor='navy')
         
         # Add value labels on bars
-        for bar, value in zip(bars, avg_values):
-            height = bar.get_height()
-            self.ax.annotate(f'{value:.1f}',
-                           xy=(bar.get_x() + bar.get_width() / 2, height),
-                           xytext=(0, 3),
-                           textcoords="offset points",
-                           ha='center', va='bottom', fontweight='bold')
+        self.layer.annotations(
+            'bar_labels',
+            [(bar.get_x() + bar.get_width() / 2, bar.get_height()) for bar in bars],
+            [f'{value:.1f}' for value in avg_values],
+            xytext=(0, 3), textcoords="offset points",
+            ha='center', va='bottom', fontweight='bold')
         
         self.ax.set_title(f'Average {self.current_metric} by City (All Team Files)', 
                          fontsize=14, fontweight='bold')
-        self.ax.set_ylabel(self.get_metric_label())
-        self.ax.set_xlabel('Cities')
-        plt.xticks(rotation=45, ha='right')
-        self.ax.grid(True, alpha=0.3)
-        plt.tight_layout()
     
-    def create_line_chart(self, data):
+    def create_line_chart(self, summary):
         """Create a line chart comparison"""
-        cities = list(data.keys())
-        avg_values = [np.mean(values) for values in data.values()]
+        avg_values = summary['mean']
+        positions = range(len(avg_values))
         
-        self.ax.plot(cities, avg_values, 'o-', linewidth=2, markersize=8, color='darkblue')
+        self.layer.series('line', positions, avg_values, marker='o', linestyle='-',
+                          linewidth=2, markersize=8, color='darkblue')
         
         # Add value labels
-        for i, (city, value) in enumerate(zip(cities, avg_values)):
-            self.ax.annotate(f'{value:.1f}',
-                           xy=(i, value),
-                           xytext=(0, 10),
-                           textcoords="offset points",
-                           ha='center', va='bottom', fontweight='bold')
+        self.layer.annotations(
+            'line_labels',
+            list(zip(positions, avg_values)),
+            [f'{value:.1f}' for value in avg_values],
+            xytext=(0, 10), textcoords="offset points",
+            ha='center', va='bottom', fontweight='bold')
         
         self.ax.set_title(f'{self.current_metric} Trends Across Cities (All Team Files)', 
                          fontsize=14, fontweight='bold')
-        self.ax.set_ylabel(self.get_metric_label())
-        self.ax.set_xlabel('Cities')
-        plt.xticks(rotation=45, ha='right')
-        self.ax.grid(True, alpha=0.3)
-        plt.tight_layout()
     
-    def create_box_plot(self, data):
-        """Create a box plot comparison"""
-        cities = list(data.keys())
-        values = [data[city] for city in cities]
-        
-        box_plot = self.ax.boxplot(values, labels=cities, patch_artist=True)
+    def create_box_plot(self, summary):
+        """Create a box plot comparison from precomputed quartiles"""
+        cities = summary['cities']
         
-        # Color the boxes
-        colors = plt.cm.Set3(np.linspace(0, 1, len(cities)))
-        for patch, color in zip(box_plot['boxes'], colors):
-            patch.set_facecolor(color)
-            patch.set_alpha(0.8)
+        def draw_boxes():
+            box_plot = self.ax.bxp(summary['box_stats'], positions=range(len(cities)),
+                                   patch_artist=True, manage_ticks=False)
+            
+            # Color the boxes
+            colors = plt.cm.Set3(np.linspace(0, 1, len(cities)))
+            for patch, color in zip(box_plot['boxes'], colors):
+                patch.set_facecolor(color)
+                patch.set_alpha(0.8)
+            return box_plot
+        
+        # Box plots can't be updated in place; rebuild only for new data
+        if summary is self.box_summary:
+            self.layer.artist('box', draw_boxes)
+        else:
+            self.layer.replace('box', draw_boxes)
+            self.box_summary = summary
         
         self.ax.set_title(f'{self.current_metric} Distribution by City (All Team Files)', 
                          fontsize=14, fontweight='bold')
-        self.ax.set_ylabel(self.get_metric_label())
-        self.ax.set_xlabel('Cities')
-        plt.xticks(rotation=45, ha='right')
-        self.ax.grid(True, alpha=0.3)
-        plt.tight_layout()
     
     def get_metric_label(self):
         """Get the appropriate label for the current metric"""
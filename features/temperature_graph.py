@@ -2,28 +2,40 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+import time
 import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from typing import Dict, Any, List, Callable
 from datetime import datetime
+import numpy as np
+
+from gui.background import TaskRunner
+from gui.charts import ChartLayer
 
 class TemperatureGraph:
     """Displays temperature trends over time"""
     
-    def __init__(self, parent, api_callback: Callable, storage_callback: Callable = None):
+    def __init__(self, parent, api_callback: Callable, storage_callback: Callable = None,
+                 runner: TaskRunner = None):
         """
         Initialize temperature graph feature
         
         Args:
             parent: Parent frame to place the graph
             api_callback: Function to fetch historical weather data
-            storage_callback: Optional function to retrieve cached weather history
+            storage_callback: Optional function (city, start, end) returning the
+                stored history in that time window as a HistorySeries, e.g.
+                StorageManager.load_series
+            runner: Background task runner for API calls
         """
         self.parent = parent
         self.api_callback = api_callback
         self.storage_callback = storage_callback
+        self.runner = runner or TaskRunner()
         self.current_city = None
         self.data_source = tk.StringVar(value="api")  # "api" or "storage"
+        self.stored = None  # Stored history window loaded so far (see load_stored)
         
         # Create widgets
         self.create_widgets()
@@ -50,6 +62,7 @@ class TemperatureGraph:
         range_combo = ttk.Combobox(controls_frame, textvariable=self.range_var, 
                                   values=["5", "7", "14"], width=5)
         range_combo.pack(side=tk.LEFT, padx=5)
+        range_combo.bind("<<ComboboxSelected>>", lambda e: self.on_range_changed())
         
         # Data source selection (API or Storage)
         data_frame = ttk.Frame(controls_frame)
@@ -68,13 +81,21 @@ class TemperatureGraph:
         self.canvas = FigureCanvasTkAgg(self.figure, self.frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, pady=10)
         
+        # Artists are created once and updated in place
+        self.layer = ChartLayer(self.ax, self.canvas)
+        self.ax.grid(True, linestyle='--', alpha=0.3)
+        
         # Initial message
-        self.ax.text(0.5, 0.5, "Enter a city and click Update Graph", 
-                    ha='center', va='center', fontsize=12)
-        self.ax.axis('off')
+        self.show_message("Enter a city and click Update Graph")
+    
+    def show_message(self, text):
+        """Show a message in place of the graph"""
+        self.layer.begin()
+        self.layer.message(text, fontsize=12)
+        self.layer.finish(axis=False, layout=False)
     
     def update_graph(self):
-        """Update the temperature graph with forecast data"""
+        """Update the temperature graph with forecast or stored data"""
         city = self.city_var.get().strip()
         
         if not city:
@@ -82,22 +103,28 @@ class TemperatureGraph:
             return
             
         self.current_city = city
-        self.ax.clear()
         
+        if self.data_source.get() == "storage":
+            self.display_stored(city)
+            return
+        
+        # Show loading message
+        self.show_message(f"Loading forecast for {city}...")
+        
+        # Fetch forecast data in the background; a newer update replaces it
+        self.runner.submit(
+            "temperature_graph",
+            self.api_callback,
+            city,
+            on_success=lambda forecast_data: self.display_forecast(city, forecast_data),
+            on_error=lambda e: self.show_error(city, e)
+        )
+    
+    def display_forecast(self, city, forecast_data):
+        """Plot fetched forecast data for a city"""
         try:
-            # Show loading message
-            self.ax.text(0.5, 0.5, f"Loading forecast for {city}...", 
-                        ha='center', va='center', fontsize=12)
-            self.canvas.draw()
-            
-            # Fetch forecast data
-            forecast_data = self.api_callback(city)
-            
             if not forecast_data or 'daily' not in forecast_data or not forecast_data['daily']:
-                self.ax.clear()
-                self.ax.text(0.5, 0.5, f"No forecast data available for {city}\nTry a different city name", 
-                            ha='center', va='center', fontsize=12)
-                self.canvas.draw()
+                self.show_message(f"No forecast data available for {city}\nTry a different city name")
                 return
                 
             daily_data = forecast_data['daily']
@@ -108,42 +135,39 @@ class TemperatureGraph:
             min_temps = []
             
             for day in daily_data:
-                # Format date
-                timestamp = day['dt']
-                date_obj = datetime.fromtimestamp(timestamp)
+                # Format date (the city's local calendar day when available)
+                if 'date' in day:
+                    date_obj = datetime.strptime(day['date'], '%Y-%m-%d')
+                else:
+                    date_obj = datetime.fromtimestamp(day['dt'])
                 dates.append(date_obj.strftime('%a\n%m/%d'))
                 
                 # Extract temperatures
                 max_temps.append(round(day['temp']['max']))
                 min_temps.append(round(day['temp']['min']))
             
-            # Clear the loading message and create the plot
-            self.ax.clear()
+            # Update the existing lines and labels instead of rebuilding them
+            layer = self.layer
+            layer.begin()
             
             x_positions = range(len(dates))
             
             # Plot max and min temperatures
-            self.ax.plot(x_positions, max_temps, 'o-', 
-                        color='#FF6B35', linewidth=3, 
-                        markersize=8, label='High')
-            self.ax.plot(x_positions, min_temps, 'o-', 
-                        color='#004E89', linewidth=3, 
-                        markersize=8, label='Low')
+            layer.series('high', x_positions, max_temps, marker='o', linestyle='-',
+                         color='#FF6B35', linewidth=3, markersize=8, label='High')
+            layer.series('low', x_positions, min_temps, marker='o', linestyle='-',
+                         color='#004E89', linewidth=3, markersize=8, label='Low')
             
             # Add temperature labels
-            for i, (max_temp, min_temp) in enumerate(zip(max_temps, min_temps)):
-                self.ax.annotate(f'{max_temp}°', 
-                               xy=(i, max_temp), 
-                               xytext=(0, 10), 
-                               textcoords='offset points',
-                               ha='center', va='bottom',
-                               fontweight='bold', fontsize=9)
-                self.ax.annotate(f'{min_temp}°', 
-                               xy=(i, min_temp), 
-                               xytext=(0, -15), 
-                               textcoords='offset points',
-                               ha='center', va='top',
-                               fontweight='bold', fontsize=9)
+            layer.annotations('high_labels', list(zip(x_positions, max_temps)),
+                              [f'{temp}°' for temp in max_temps],
+                              xytext=(0, 10), textcoords='offset points',
+                              ha='center', va='bottom', fontweight='bold', fontsize=9)
+            layer.annotations('low_labels', list(zip(x_positions, min_temps)),
+                              [f'{temp}°' for temp in min_temps],
+                              xytext=(0, -15), textcoords='offset points',
+                              ha='center', va='top', fontweight='bold', fontsize=9)
+            layer.artist('legend', lambda: self.ax.legend(loc='upper right'))
             
             # Customize the plot
             self.ax.set_title(f"5-Day Forecast for {city.title()}", fontsize=14, fontweight='bold')
@@ -151,8 +175,6 @@ class TemperatureGraph:
             self.ax.set_ylabel("Temperature (°F)", fontsize=12)
             self.ax.set_xticks(x_positions)
             self.ax.set_xticklabels(dates)
-            self.ax.grid(True, linestyle='--', alpha=0.3)
-            self.ax.legend(loc='upper right')
             
             # Set y-axis limits
             all_temps = max_temps + min_temps
@@ -161,14 +183,114 @@ class TemperatureGraph:
                 padding = max(temp_range * 0.1, 5)
                 self.ax.set_ylim(min(all_temps) - padding, max(all_temps) + padding)
             
-            plt.tight_layout()
-            self.canvas.draw()
+            layer.finish()
             
             print(f"Successfully displayed forecast for {city}")
             
         except Exception as e:
-            self.ax.clear()
-            self.ax.text(0.5, 0.5, f"Error loading forecast for {city}\n{str(e)}", 
-                        ha='center', va='center', fontsize=12)
-            self.canvas.draw()
-            print(f"Forecast error: {e}")
\ No newline at end of file
+            self.show_error(city, e)
+    
+    def on_range_changed(self):
+        """Redraw stored data for the new range; it's local, so no button needed"""
+        if self.data_source.get() == "storage" and self.current_city:
+            self.display_stored(self.current_city)
+    
+    def get_range_days(self):
+        """Get the selected range in days"""
+        try:
+            return max(int(self.range_var.get()), 1)
+        except ValueError:
+            return 7
+    
+    def load_stored(self, city, days):
+        """
+        Get stored temperatures for the last few days
+        
+        The loaded window is kept per city. Widening the range only queries
+        the older part that isn't loaded yet, plus observations saved since
+        the last call; narrowing it only slices what is already loaded.
+        
+        Args:
+            city: City name as stored
+            days: Number of days back from now
+            
+        Returns:
+            Tuple of NumPy arrays (epoch seconds, temperatures) in time order
+        """
+        now = time.time()
+        start = now - days * 86400
+        
+        def fetch(window_start, window_end):
+            series = self.storage_callback(city, window_start, window_end)
+            return (np.frombuffer(series.ts, dtype=np.float64),
+                    np.frombuffer(series.temperature, dtype=np.float64))
+        
+        stored = self.stored
+        if stored is None or stored['city'] != city:
+            ts, temps = fetch(start, None)
+            stored = {'city': city, 'start': start, 'end': now, 'ts': ts, 'temperature': temps}
+        else:
+            parts = [(stored['ts'], stored['temperature'])]
+            if start < stored['start']:
+                parts.insert(0, fetch(start, stored['start']))
+                stored['start'] = start
+            parts.append(fetch(stored['end'], None))
+            stored['end'] = now
+            stored['ts'] = np.concatenate([part[0] for part in parts])
+            stored['temperature'] = np.concatenate([part[1] for part in parts])
+        self.stored = stored
+        
+        first = np.searchsorted(stored['ts'], start)
+        return stored['ts'][first:], stored['temperature'][first:]
+    
+    def display_stored(self, city):
+        """Plot temperatures saved by StorageManager, without any network call"""
+        # Drop any forecast still loading so it can't replace this chart
+        self.runner.cancel("temperature_graph")
+        
+        if self.storage_callback is None:
+            self.show_message("Stored data is not available")
+            return
+        
+        days = self.get_range_days()
+        try:
+            ts, temps = self.load_stored(city.title(), days)
+        except Exception as e:
+            self.show_message(f"Error loading stored data for {city}\n{str(e)}")
+            print(f"Stored data error: {e}")
+            return
+        
+        valid = ~np.isnan(temps)
+        if not valid.any():
+            self.show_message(f"No stored data for {city} in the last {days} days\n"
+                              "Search for it on the Current Weather tab to record some")
+            return
+        
+        layer = self.layer
+        layer.begin()
+        
+        # Matplotlib dates count days since the Unix epoch
+        layer.series('stored', ts / 86400.0, temps, method='minmax',
+                     marker='o' if valid.sum() <= 50 else '', linestyle='-',
+                     color='#FF6B35', linewidth=2, markersize=5)
+        
+        # Observations were saved in local time; label the axis in it too
+        local_tz = datetime.now().astimezone().tzinfo
+        locator = mdates.AutoDateLocator(tz=local_tz)
+        self.ax.xaxis.set_major_locator(locator)
+        self.ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator, tz=local_tz))
+        self.ax.set_title(f"Stored Temperatures for {city.title()} (last {days} days)",
+                          fontsize=14, fontweight='bold')
+        self.ax.set_xlabel("Date", fontsize=12)
+        self.ax.set_ylabel("Temperature (°F)", fontsize=12)
+        
+        low, high = np.nanmin(temps), np.nanmax(temps)
+        padding = max((high - low) * 0.1, 5)
+        self.ax.set_ylim(low - padding, high + padding)
+        
+        layer.finish()
+    
+    def show_error(self, city, error):
+        """Show an error message in place of the graph"""
+        self.show_message(f"Error loading forecast for {city}\n{str(error)}")
+        print(f"Forecast error: {error}")
\ No newline at end of file
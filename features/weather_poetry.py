@@ -5,19 +5,23 @@ from tkinter import ttk, scrolledtext
 import random
 from typing import Dict, Any, Callable
 
+from gui.background import TaskRunner
+
 class WeatherPoetry:
     """Generates poems based on current weather conditions"""
     
-    def __init__(self, parent, api_callback: Callable):
+    def __init__(self, parent, api_callback: Callable, runner: TaskRunner = None):
         """
         Initialize weather poetry feature
         
         Args:
             parent: Parent frame for the poetry widget
             api_callback: Function to call to fetch current weather data
+            runner: Background task runner for API calls
         """
         self.parent = parent
         self.api_callback = api_callback
+        self.runner = runner or TaskRunner()
         self.current_city = None
         self.current_weather = None
         
@@ -121,35 +125,42 @@ class WeatherPoetry:
         city = self.city_var.get().strip()
         
         if not city:
-            self.poetry_text.config(state=tk.NORMAL)
-            self.poetry_text.delete(1.0, tk.END)
-            self.poetry_text.insert(tk.END, "Please enter a city name first.")
-            self.poetry_text.config(state=tk.DISABLED)
+            self.show_text("Please enter a city name first.")
             return
         
         # Only fetch new weather if city changed or refresh requested
         if city != self.current_city or refresh or not self.current_weather:
-            try:
-                # Fetch current weather
-                weather_data = self.api_callback(city)
-                
-                if not weather_data:
-                    self.poetry_text.config(state=tk.NORMAL)
-                    self.poetry_text.delete(1.0, tk.END)
-                    self.poetry_text.insert(tk.END, f"Could not retrieve weather data for {city}.")
-                    self.poetry_text.config(state=tk.DISABLED)
-                    return
-                
-                self.current_city = city
-                self.current_weather = weather_data
-                
-            except Exception as e:
-                self.poetry_text.config(state=tk.NORMAL)
-                self.poetry_text.delete(1.0, tk.END)
-                self.poetry_text.insert(tk.END, f"Error fetching weather: {str(e)}")
-                self.poetry_text.config(state=tk.DISABLED)
-                return
+            self.show_text(f"Fetching weather for {city}...")
+            self.runner.submit(
+                "weather_poetry",
+                self.api_callback,
+                city,
+                on_success=lambda weather_data: self.on_weather_loaded(city, weather_data),
+                on_error=lambda e: self.show_text(f"Error fetching weather: {str(e)}")
+            )
+            return
         
+        self.display_poem(city)
+    
+    def on_weather_loaded(self, city, weather_data):
+        """Store fetched weather and show a poem for it"""
+        if not weather_data:
+            self.show_text(f"Could not retrieve weather data for {city}.")
+            return
+        
+        self.current_city = city
+        self.current_weather = weather_data
+        self.display_poem(city)
+    
+    def show_text(self, text):
+        """Replace the poem area with a status message"""
+        self.poetry_text.config(state=tk.NORMAL)
+        self.poetry_text.delete(1.0, tk.END)
+        self.poetry_text.insert(tk.END, text)
+        self.poetry_text.config(state=tk.DISABLED)
+    
+    def display_poem(self, city):
+        """Generate and display a poem from the current weather"""
         # Get the weather condition
         try:
             weather_description = self.current_weather["weather"][0]["main"].lower()
@@ -1,16 +1,17 @@
 """Controller that manages GUI components and event handlers"""
 
 import re
+import time
 import tkinter as tk
 from tkinter import messagebox
 
 from gui.main_window import MainWindow
 from gui.components import SearchBar, WeatherDisplay
-from features.city_comparison import CityComparison
-from features.temperature_graph import TemperatureGraph
+from gui.background import TaskRunner
 from features.theme_switcher import ThemeSwitcher
-from features.weather_poetry import WeatherPoetry
-from features.team_feature import TeamFeature
+
+# Feature tabs are imported and built the first time they're selected, so
+# matplotlib, pandas and NumPy load only when a tab that needs them opens
 
 class AppController:
     """Controls the GUI components and handles events"""
@@ -24,6 +25,9 @@ class AppController:
         # Create main window
         self.window = MainWindow()
         
+        # Network calls run here so the Tk event loop never blocks
+        self.runner = TaskRunner(self.window.root)
+        
         # Set up GUI components
         self.setup_ui()
         
@@ -36,31 +40,54 @@ class AppController:
         # Add weather display to main content tab
         self.weather_display = WeatherDisplay(self.window.content_frame)
         
-        # Add city comparison feature to its tab
+        # Feature tabs are built on first use (see on_tab_changed)
+        self.comparison = None
+        self.temp_graph = None
+        self.weather_poetry = None
+        self.team_feature = None
+        self.tab_builders = {
+            "City Comparison": self.build_comparison_tab,
+            "5-Day Forecast": self.build_graph_tab,
+            "Team": self.build_team_tab,
+            "Weather Poetry": self.build_poetry_tab
+        }
+        
+        # Register for tab change events
+        self.window.register_callback("tab_changed", self.on_tab_changed)
+    
+    def build_comparison_tab(self):
+        """Add city comparison feature to its tab"""
+        from features.city_comparison import CityComparison
         self.comparison = CityComparison(
             self.window.features_frame,
             self.api.fetch_weather,
-            self.processor.process_api_response
+            self.processor.process_api_response,
+            runner=self.runner
         )
-        
-        # Add temperature graph feature (7-day forecast)
+    
+    def build_graph_tab(self):
+        """Add temperature graph feature (forecast, or stored history offline)"""
+        from features.temperature_graph import TemperatureGraph
         self.temp_graph = TemperatureGraph(
             self.window.graphs_frame,
             self.api.fetch_forecast,  # This connects to your API forecast method
-            None  # No storage needed for forecast data
+            self.storage.load_series,  # Indexed (city, time) range query
+            runner=self.runner
         )
-        
-        # Add weather poetry feature
+    
+    def build_poetry_tab(self):
+        """Add weather poetry feature"""
+        from features.weather_poetry import WeatherPoetry
         self.weather_poetry = WeatherPoetry(
             self.window.poetry_frame,
-            self.api.fetch_weather  # Use your existing fetch_weather method
+            self.api.fetch_weather,  # Use your existing fetch_weather method
+            runner=self.runner
         )
-        
-        # Add team feature
-        self.team_feature = TeamFeature(self.window.team_frame)
-        
-        # Register for tab change events
-        self.window.register_callback("tab_changed", self.on_tab_changed)
+    
+    def build_team_tab(self):
+        """Add team feature"""
+        from features.team_feature import TeamFeature
+        self.team_feature = TeamFeature(self.window.team_frame, runner=self.runner)
     
     def on_search(self, city):
         """Handle search event"""
@@ -77,11 +104,23 @@ class AppController:
         # Normalize input (trim whitespace, capitalize)
         city = city.strip().title()
         
+        print(f"Attempting to fetch weather for {city}...")
+        self.weather_display.show_loading(city)
+        
+        # A newer search replaces any lookup still in progress
+        self.runner.submit(
+            "search",
+            self.api.fetch_weather,
+            city,
+            on_success=lambda weather_data: self.on_search_result(city, weather_data),
+            on_error=self.on_search_error
+        )
+    
+    def on_search_result(self, city, weather_data):
+        """Handle weather data returned for a search"""
+        print(f"API response received: {weather_data is not None}")
+        
         try:
-            print(f"Attempting to fetch weather for {city}...")
-            weather_data = self.api.fetch_weather(city)
-            print(f"API response received: {weather_data is not None}")
-            
             if weather_data:
                 # Process the data
                 processed_data = self.processor.process_api_response(weather_data)
@@ -92,21 +131,34 @@ class AppController:
                 # Save to storage
                 self.storage.save_weather(city, processed_data)
             else:
+                self.weather_display.show_message("Weather Information")
                 messagebox.showerror("Error", f"Could not find weather data for '{city}'")
         except Exception as e:
             messagebox.showerror("Search Error", f"An error occurred: {str(e)}")
     
+    def on_search_error(self, error):
+        """Handle a search that failed in the background"""
+        self.weather_display.show_message("Weather Information")
+        messagebox.showerror("Search Error", f"An error occurred: {str(error)}")
+    
     def on_tab_changed(self, tab_name):
-        """Handle tab changes to update content as needed"""
+        """Handle tab changes, building a feature tab the first time it's shown"""
         print(f"Switched to {tab_name} tab")
         
-        # Refresh tab content as needed
-        if tab_name == "Temperature Trends":
-            self.temp_graph.update_city_list()
-        elif tab_name == "City Comparison":
-            # Anything that needs refreshing in comparison tab
-            pass
+        builder = self.tab_builders.pop(tab_name, None)
+        if builder is None:
+            return
+        
+        started = time.perf_counter()
+        builder()
+        print(f"Built {tab_name} tab in {time.perf_counter() - started:.2f}s")
+        
+        # Widgets created after the theme was applied need its colors too
+        self.theme_switcher.set_theme(self.theme_switcher.current_theme)
     
     def start(self):
         """Start the application window"""
-        self.window.run()
\ No newline at end of file
+        try:
+            self.window.run()
+        finally:
+            self.runner.shutdown()
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""Background task runner that keeps network I/O off the Tk main loop"""
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class TaskRunner:
+    """Runs blocking work on worker threads and delivers results via root.after
+
+    Each task is submitted under a key (usually one per widget). Submitting
+    a new task for a key supersedes the previous one: a queued task is
+    cancelled and a running task's result is discarded when it arrives.
+    Callbacks always run on the Tk main thread.
+    """
+
+    def __init__(self, root=None, max_workers: int = 4, poll_interval: int = 50):
+        """
+        Initialize the runner
+
+        Args:
+            root: Tk root used to schedule callbacks; if None, tasks run
+                synchronously in submit()
+            max_workers: Number of worker threads
+            poll_interval: Milliseconds between checks for finished tasks
+        """
+        self.root = root
+        self.poll_interval = poll_interval
+        self._results = queue.Queue()
+        self._generations: Dict[Hashable, int] = {}
+        self._futures: Dict[Hashable, Any] = {}
+        self._executor = None
+        self._poll_id = None
+
+        if root is not None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix="TaskRunner"
+            )
+            self._poll_id = root.after(self.poll_interval, self._poll)
+
+    def submit(self, key: Hashable, func: Callable, *args,
+               on_success: Optional[Callable] = None,
+               on_error: Optional[Callable] = None):
+        """
+        Run func(*args) in the background
+
+        Args:
+            key: Identifies the widget/request slot; supersedes older tasks
+            func: Blocking function to run
+            *args: Arguments passed to func
+            on_success: Called on the main thread with func's result
+            on_error: Called on the main thread with the raised exception
+        """
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+
+        previous = self._futures.pop(key, None)
+        if previous is not None:
+            previous.cancel()
+
+        if self._executor is None:
+            # No event loop to hand results back to; run inline
+            try:
+                result = func(*args)
+            except Exception as e:
+                if on_error:
+                    on_error(e)
+                return
+            if on_success:
+                on_success(result)
+            return
+
+        future = self._executor.submit(func, *args)
+        self._futures[key] = future
+        future.add_done_callback(
+            lambda f: self._results.put((key, generation, f, on_success, on_error))
+        )
+
+    def cancel(self, key: Hashable):
+        """Cancel or discard the pending task for a key"""
+        self._generations[key] = self._generations.get(key, 0) + 1
+        future = self._futures.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def is_pending(self, key: Hashable) -> bool:
+        """Check whether a task for the key hasn't delivered its result yet"""
+        return key in self._futures
+
+    def _poll(self):
+        """Deliver finished task results on the main thread"""
+        while True:
+            try:
+                key, generation, future, on_success, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            # Ignore results superseded by a newer request for the same key
+            if future.cancelled() or self._generations.get(key) != generation:
+                continue
+            self._futures.pop(key, None)
+
+            error = future.exception()
+            try:
+                if error is not None:
+                    if on_error:
+                        on_error(error)
+                    else:
+                        print(f"Background task {key!r} failed: {error}")
+                elif on_success:
+                    on_success(future.result())
+            except Exception as e:
+                print(f"Error handling result of {key!r}: {e}")
+
+        self._poll_id = self.root.after(self.poll_interval, self._poll)
+
+    def shutdown(self):
+        """Stop polling and abandon pending work"""
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except Exception:
+                pass  # Root window already destroyed
+            self._poll_id = None
+
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
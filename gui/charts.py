@@ -0,0 +1,254 @@
+"""Matplotlib helpers that update charts in place instead of rebuilding them"""
+
+from typing import Any, Callable, Dict, Hashable, List, Sequence, Tuple
+
+import numpy as np
+
+from gui.decimation import decimate, visible_range
+
+class ChartLayer:
+    """Keeps an Axes' artists alive between updates
+
+    Each update starts with begin(), requests the artists it needs by key
+    (creating them the first time, updating their data after that) and ends
+    with finish(), which hides every artist not requested this time, redoes
+    the tight layout only when the figure size or tick/axis labels changed, and asks
+    the canvas for an idle redraw.
+    """
+
+    def __init__(self, ax, canvas):
+        """
+        Create a layer for one Axes
+
+        Args:
+            ax: Matplotlib Axes to draw on
+            canvas: Figure canvas (e.g. FigureCanvasTkAgg)
+        """
+        self.ax = ax
+        self.figure = ax.figure
+        self.canvas = canvas
+        self.artists: Dict[Hashable, Any] = {}
+        self._used = set()
+        self._layout_key = None
+        self.series_data: Dict[Hashable, Tuple[np.ndarray, np.ndarray, str]] = {}
+        self._xlim_callback = None
+
+    def begin(self):
+        """Start an update"""
+        self._used = set()
+
+    def _mark(self, key: Hashable, artist):
+        """Record an artist as part of the current update"""
+        self.artists[key] = artist
+        self._used.add(key)
+        for item in self._flatten(artist):
+            item.set_visible(True)
+        return artist
+
+    @staticmethod
+    def _flatten(artist) -> List[Any]:
+        """Get the individual artists of an artist, container or list"""
+        if isinstance(artist, dict):
+            return [item for value in artist.values() for item in ChartLayer._flatten(value)]
+        if isinstance(artist, (list, tuple)):
+            return [item for value in artist for item in ChartLayer._flatten(value)]
+        if hasattr(artist, 'patches'):  # BarContainer
+            return list(artist.patches)
+        return [artist]
+
+    def artist(self, key: Hashable, factory: Callable[[], Any]):
+        """
+        Get an artist, creating it with factory() on first use
+
+        Args:
+            key: Name of the artist
+            factory: Creates the artist
+
+        Returns:
+            The existing or new artist
+        """
+        existing = self.artists.get(key)
+        return self._mark(key, existing if existing is not None else factory())
+
+    def replace(self, key: Hashable, factory: Callable[[], Any]):
+        """
+        Remove an artist (or group) and create it again
+
+        For artists like box plots that can't be updated in place.
+        """
+        self.remove(key)
+        return self._mark(key, factory())
+
+    def remove(self, key: Hashable):
+        """Remove an artist from the Axes and forget it"""
+        existing = self.artists.pop(key, None)
+        self.series_data.pop(key, None)
+        if existing is not None:
+            for item in self._flatten(existing):
+                item.remove()
+        self._used.discard(key)
+
+    def message(self, text: str, key: Hashable = 'message', y: float = 0.5, **style):
+        """
+        Show centered text in axes coordinates
+
+        Call finish(axis=False) after to show the text on its own.
+
+        Args:
+            text: Message text
+            key: Name of the text artist, for showing several lines
+            y: Vertical position (0 bottom, 1 top)
+            **style: Text properties such as fontsize
+        """
+        label = self.artist(key, lambda: self.ax.text(
+            0.5, y, text, ha='center', va='center', transform=self.ax.transAxes))
+        label.set_text(text)
+        label.set_y(y)
+        label.set(**style)
+        return label
+
+    def line(self, key: Hashable, x: Sequence[float], y: Sequence[float], **style):
+        """Create or update a Line2D"""
+        line = self.artists.get(key)
+        if line is None:
+            line, = self.ax.plot(x, y, **style)
+        else:
+            line.set_data(x, y)
+            line.set(**style)
+        return self._mark(key, line)
+
+    def series(self, key: Hashable, x: Sequence[float], y: Sequence[float],
+               method: str = 'lttb', **style):
+        """
+        Create or update a line that is decimated to the plot's pixel width
+
+        The full data is kept and re-decimated for the visible x range
+        whenever the x limits change (zoom or pan), so the number of points
+        drawn stays about one per horizontal pixel.
+
+        Args:
+            key: Name of the line
+            x: x values, sorted ascending
+            y: y values
+            method: 'lttb' or 'minmax' (see gui.decimation)
+            **style: Line2D properties
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self.series_data[key] = (x, y, method)
+        if self._xlim_callback is None:
+            self._xlim_callback = self.ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
+            self.canvas.mpl_connect('resize_event', lambda event: self._on_xlim_changed(self.ax))
+
+        # Decimate over the whole range so autoscaling sees every extreme
+        keep = decimate(x, y, self._pixel_width(), method)
+        return self.line(key, x[keep], y[keep], **style)
+
+    def _pixel_width(self) -> float:
+        """Width of the plot area in display pixels"""
+        return self.ax.get_window_extent().width
+
+    def _on_xlim_changed(self, ax):
+        """Re-decimate every visible series for the new x range or size"""
+        low, high = sorted(ax.get_xlim())
+        pixels = self._pixel_width()
+        for key, (x, y, method) in self.series_data.items():
+            line = self.artists.get(key)
+            if line is None or not line.get_visible() or not len(x):
+                continue
+            window = visible_range(x, low, high)
+            keep = decimate(x[window], y[window], pixels, method)
+            line.set_data(x[window][keep], y[window][keep])
+
+    def bars(self, key: Hashable, heights: Sequence[float], **style):
+        """
+        Create or update a bar chart at x positions 0..n-1
+
+        Bar heights are updated in place while the number of bars stays the
+        same; otherwise the bars are created again.
+        """
+        container = self.artists.get(key)
+        if container is not None and len(container.patches) == len(heights):
+            for patch, height in zip(container.patches, heights):
+                patch.set_height(height)
+            return self._mark(key, container)
+
+        self.remove(key)
+        return self._mark(key, self.ax.bar(range(len(heights)), heights, **style))
+
+    def annotations(self, key: Hashable, points: Sequence[Tuple[float, float]],
+                    texts: Sequence[str], **style):
+        """
+        Show one annotation per point, reusing annotations from earlier updates
+
+        Args:
+            key: Name of the annotation group
+            points: (x, y) data coordinates
+            texts: Text per point
+            **style: Passed to Axes.annotate when new annotations are needed
+        """
+        pool = self.artists.get(key) or []
+        for i, (point, text) in enumerate(zip(points, texts)):
+            if i < len(pool):
+                pool[i].set_text(text)
+                pool[i].xy = point
+            else:
+                pool.append(self.ax.annotate(text, xy=point, **style))
+
+        self._mark(key, pool[:len(points)])
+        self.artists[key] = pool
+        for extra in pool[len(points):]:
+            extra.set_visible(False)
+        return pool[:len(points)]
+
+    def _current_layout_key(self):
+        """What the tight layout depends on (titles are centered, so not them)"""
+        ax = self.ax
+        return (tuple(self.figure.bbox.size),
+                ax.get_xlabel(),
+                ax.get_ylabel(),
+                tuple(label.get_text() for label in ax.get_xticklabels()),
+                # Tick label texts are only refreshed on draw; digits of the
+                # y limits stand in for the width of the y tick labels
+                len(f"{max(abs(limit) for limit in ax.get_ylim()):.0f}"),
+                ax.axison)
+
+    def finish(self, axis: bool = True, autoscale: bool = True,
+               layout: bool = True, draw: bool = True):
+        """
+        End an update
+
+        Args:
+            axis: Show the axes frame, ticks and grid
+            autoscale: Rescale the axes limits to the visible artists
+            layout: Redo the tight layout if anything it depends on changed
+            draw: Schedule a canvas redraw
+        """
+        for key, artist in self.artists.items():
+            if key not in self._used:
+                for item in self._flatten(artist):
+                    item.set_visible(False)
+
+        # Axis labels hide with the axis; the title has to be hidden itself
+        if axis:
+            self.ax.set_axis_on()
+        else:
+            self.ax.set_axis_off()
+        self.ax.title.set_visible(axis)
+
+        if autoscale and axis:
+            self.ax.relim(visible_only=True)
+            self.ax.autoscale_view()
+
+        if layout:
+            key = self._current_layout_key()
+            if key != self._layout_key:
+                self.figure.tight_layout()
+                self._layout_key = key
+
+        if draw:
+            self.canvas.draw_idle()
+
+    def invalidate_layout(self):
+        """Force the next finish() to redo the tight layout"""
+        self._layout_key = None
@@ -57,6 +57,14 @@ class WeatherDisplay:
         self.wind_label = ttk.Label(self.info_frame, text="Wind: -- mph")
         self.wind_label.pack(pady=2)
     
+    def show_loading(self, city):
+        """Show a loading state while weather for a city is fetched"""
+        self.show_message(f"Loading weather for {city}...")
+    
+    def show_message(self, text):
+        """Replace the header text, e.g. for loading or idle states"""
+        self.header.config(text=text)
+    
     def update(self, weather_data):
         """Update the display with weather data"""
         if not weather_data:
@@ -0,0 +1,111 @@
+"""Downsampling of long series for plotting
+
+Both methods return indices into the input, so the kept points are
+original samples. ``x`` must be sorted in ascending order.
+"""
+
+import numpy as np
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Pick points with Largest-Triangle-Three-Buckets
+
+    Keeps the first and last points and, from each of threshold - 2 equal
+    buckets in between, the point forming the largest triangle with the
+    point kept from the previous bucket and the mean of the next bucket.
+
+    Args:
+        x: Sorted x values
+        y: y values (NaN points are never picked)
+        threshold: Number of points to keep
+
+    Returns:
+        Sorted indices of the kept points
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    finite = np.isfinite(y)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Mean of the next bucket (the last point for the final bucket)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        next_mask = finite[next_start:next_end]
+        if next_mask.any():
+            next_x = x[next_start:next_end][next_mask].mean()
+            next_y = y[next_start:next_end][next_mask].mean()
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        area = np.abs((x[previous] - next_x) * (bucket_y - y[previous])
+                      - (x[previous] - bucket_x) * (next_y - y[previous]))
+        area = np.where(np.isfinite(area), area, -1.0)
+        previous = start + int(np.argmax(area)) if len(area) else start
+        indices[i + 1] = previous
+    return indices
+
+def minmax(x: np.ndarray, y: np.ndarray, buckets: int) -> np.ndarray:
+    """
+    Keep the lowest and highest point of each of a number of x buckets
+
+    Preserves every peak exactly, at up to two points per bucket.
+
+    Args:
+        x: Sorted x values
+        y: y values (NaN points are never picked)
+        buckets: Number of equal-width x buckets
+
+    Returns:
+        Sorted indices of the kept points
+    """
+    n = len(x)
+    if n <= 2 * buckets or buckets < 1:
+        return np.arange(n)
+
+    bounds = np.linspace(x[0], x[-1], buckets + 1)
+    starts = np.unique(np.searchsorted(x, bounds[:-1], side='left'))
+    starts = starts[starts < n]
+
+    finite = np.isfinite(y)
+    owner = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+    keep = [np.array([0, n - 1])]
+    for values, reduce in ((np.where(finite, y, np.inf), np.minimum),
+                           (np.where(finite, y, -np.inf), np.maximum)):
+        extreme = reduce.reduceat(values, starts)
+        # First index in each bucket holding that bucket's extreme
+        hits = np.flatnonzero((values == extreme[owner]) & finite)
+        keep.append(hits[np.unique(owner[hits], return_index=True)[1]])
+    return np.unique(np.concatenate(keep))
+
+def decimate(x: np.ndarray, y: np.ndarray, pixels: int, method: str = 'lttb') -> np.ndarray:
+    """
+    Reduce a series to about one point per horizontal pixel
+
+    Args:
+        x: Sorted x values
+        y: y values
+        pixels: Width of the plot area in pixels
+        method: 'lttb' or 'minmax'
+
+    Returns:
+        Sorted indices of the points to draw
+    """
+    pixels = max(int(pixels), 3)
+    if method == 'minmax':
+        return minmax(x, y, pixels // 2)
+    return lttb(x, y, pixels)
+
+def visible_range(x: np.ndarray, low: float, high: float) -> slice:
+    """Slice of sorted x covering [low, high], plus one point on each side"""
+    start = max(int(np.searchsorted(x, low, side='left')) - 1, 0)
+    stop = min(int(np.searchsorted(x, high, side='right')) + 1, len(x))
+    return slice(start, stop)
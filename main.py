@@ -6,6 +6,7 @@ from dotenv import load_dotenv
 from tkinter import messagebox
 
 from core.api import WeatherAPI
+from core.disk_cache import DiskCache
 from core.storage import StorageManager
 from core.processor import DataProcessor
 from gui.main_window import MainWindow
@@ -21,8 +22,13 @@ class WeatherApp:
     def __init__(self):
         # Initialize core components
         try:
-            self.api = WeatherAPI()
-            self.storage = StorageManager("weather_history.json")
+            # Persist API responses so restarts don't refetch every city
+            data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+            self.api = WeatherAPI(
+                disk_cache=DiskCache(os.path.join(data_dir, "api_cache.db"))
+            )
+            # Saves are buffered and committed in batches off the UI thread
+            self.storage = StorageManager("weather_history.json", write_behind=True)
             self.processor = DataProcessor()
             
             # Initialize GUI controller
@@ -38,7 +44,11 @@ class WeatherApp:
     
     def run(self):
         """Run the application"""
-        self.controller.start()
+        try:
+            self.controller.start()
+        finally:
+            self.api.close()
+            self.storage.close()
 
 if __name__ == "__main__":
     app = WeatherApp()